@@ -0,0 +1,230 @@
+# analytics.py
+from datetime import date, datetime, time, timedelta
+from flask import current_app
+from sqlalchemy import case, delete, event, func, or_, select, union_all
+from sqlalchemy.orm import object_session
+from models import (db, Tool, Task, ToolIssue, ToolUsageDaily, ToolUsageTotal, task_archive,
+                    tool_issue_archive)
+
+# Tool utilization and maintenance analytics from precomputed rollups. Every
+# task that completes (or is reopened) and every reported issue adds a delta to
+# the tool's row for that day (ToolUsageDaily) and to its running totals
+# (ToolUsageTotal), upserted in the same transaction as the change itself, so
+# the analytics never scan the task or issue history. rebuild_rollups()
+# recomputes both tables from the hot and archive tables once (upgrade-db,
+# `flask rebuild-analytics`).
+#
+# Utilization is task time: assigned -> completed, split across the days it
+# spans; two tasks sharing a tool both count.
+
+
+def busy_by_day(start, end):
+    # Yields (day, seconds) for the part of [start, end) falling on each day
+    while start < end:
+        stop = min(end, datetime.combine(start.date() + timedelta(days=1), time.min))
+        yield start.date(), int((stop - start).total_seconds())
+        start = stop
+
+
+class Rollup:
+    # Deltas for both rollup tables, merged in memory and written as upserts
+    def __init__(self):
+        self.daily = {}  # (tool_id, day) -> [busy_seconds, tasks_completed, issues_reported]
+        self.totals = {} # tool_id -> [busy_seconds, tasks_completed, issues_reported, first_issue_at, last_issue_at]
+
+    def _total(self, tool_id):
+        return self.totals.setdefault(tool_id, [0, 0, 0, None, None])
+
+    def task(self, tool_id, assigned_date, completed_date, sign=1):
+        # sign=-1 takes back a completion (task reopened)
+        if not tool_id or not assigned_date or not completed_date:
+            return
+        total = self._total(tool_id)
+        for day, seconds in busy_by_day(assigned_date, completed_date):
+            self.daily.setdefault((tool_id, day), [0, 0, 0])[0] += sign * seconds
+            total[0] += sign * seconds
+        self.daily.setdefault((tool_id, completed_date.date()), [0, 0, 0])[1] += sign
+        total[1] += sign
+
+    def issue(self, tool_id, reported_date):
+        self.daily.setdefault((tool_id, reported_date.date()), [0, 0, 0])[2] += 1
+        total = self._total(tool_id)
+        total[2] += 1
+        total[3] = min(total[3] or reported_date, reported_date)
+        total[4] = max(total[4] or reported_date, reported_date)
+
+    def write(self, session, batch_size=5000):
+        # Dialect-specific for ON CONFLICT; imported here so SQLite deployments never load the other
+        if session.get_bind().dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(ToolUsageDaily)
+        stmt = stmt.on_conflict_do_update(index_elements=['tool_id', 'day'], set_={
+            'busy_seconds': ToolUsageDaily.busy_seconds + stmt.excluded.busy_seconds,
+            'tasks_completed': ToolUsageDaily.tasks_completed + stmt.excluded.tasks_completed,
+            'issues_reported': ToolUsageDaily.issues_reported + stmt.excluded.issues_reported,
+        })
+        _execute_batches(session, stmt, [
+            {'tool_id': tool_id, 'day': day, 'busy_seconds': busy, 'tasks_completed': tasks,
+             'issues_reported': issues} for (tool_id, day), (busy, tasks, issues) in self.daily.items()], batch_size)
+
+        stmt = insert(ToolUsageTotal)
+        first, last = ToolUsageTotal.first_issue_at, ToolUsageTotal.last_issue_at
+        stmt = stmt.on_conflict_do_update(index_elements=['tool_id'], set_={
+            'busy_seconds': ToolUsageTotal.busy_seconds + stmt.excluded.busy_seconds,
+            'tasks_completed': ToolUsageTotal.tasks_completed + stmt.excluded.tasks_completed,
+            'issues_reported': ToolUsageTotal.issues_reported + stmt.excluded.issues_reported,
+            'first_issue_at': case((first.is_(None), stmt.excluded.first_issue_at),
+                                   (stmt.excluded.first_issue_at < first, stmt.excluded.first_issue_at),
+                                   else_=first),
+            'last_issue_at': case((last.is_(None), stmt.excluded.last_issue_at),
+                                  (stmt.excluded.last_issue_at > last, stmt.excluded.last_issue_at),
+                                  else_=last),
+        })
+        _execute_batches(session, stmt, [
+            {'tool_id': tool_id, 'busy_seconds': busy, 'tasks_completed': tasks, 'issues_reported': issues,
+             'first_issue_at': first_at, 'last_issue_at': last_at}
+            for tool_id, (busy, tasks, issues, first_at, last_at) in self.totals.items()], batch_size)
+
+
+def _execute_batches(session, stmt, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        session.execute(stmt, rows[start:start + batch_size])
+
+
+# Incremental updates: write paths record their deltas on the session, and
+# before_commit upserts them in the same transaction
+def _rollup(session):
+    return session.info.setdefault('usage_rollup', Rollup())
+
+def record_task(session, tool_id, assigned_date, completed_date, sign=1):
+    # Call when a task enters "Completed" (sign=-1 with its old dates when it leaves)
+    _rollup(session).task(tool_id, assigned_date, completed_date, sign)
+
+def _issue_created(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        _rollup(session).issue(target.tool_id, target.reported_date)
+
+event.listen(ToolIssue, 'after_insert', _issue_created)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _before_commit(session):
+    session.flush() # Issues inserted by the commit's own flush record theirs first
+    rollup = session.info.pop('usage_rollup', None)
+    if rollup is not None:
+        rollup.write(session)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('usage_rollup', None)
+
+
+def rebuild_rollups(session=None, batch_size=5000):
+    # Recompute both tables from all history, archived rows included
+    session = session or db.session
+    rollup = Rollup()
+    tasks = union_all(
+        select(Task.tool_id, Task.assigned_date, Task.completed_date)
+        .where(Task.status == 'Completed', Task.tool_id.isnot(None)),
+        select(task_archive.c.tool_id, task_archive.c.assigned_date, task_archive.c.completed_date)
+        .where(task_archive.c.status == 'Completed', task_archive.c.tool_id.isnot(None)))
+    for tool_id, assigned_date, completed_date in session.execute(tasks).yield_per(batch_size):
+        rollup.task(tool_id, assigned_date, completed_date)
+    issues = union_all(select(ToolIssue.tool_id, ToolIssue.reported_date),
+                       select(tool_issue_archive.c.tool_id, tool_issue_archive.c.reported_date))
+    for tool_id, reported_date in session.execute(issues).yield_per(batch_size):
+        rollup.issue(tool_id, reported_date)
+    # Rollups of tools that no longer exist have nowhere to go
+    tool_ids = set(session.scalars(select(Tool.id)))
+    rollup.daily = {key: value for key, value in rollup.daily.items() if key[0] in tool_ids}
+    rollup.totals = {key: value for key, value in rollup.totals.items() if key in tool_ids}
+    session.execute(delete(ToolUsageDaily))
+    session.execute(delete(ToolUsageTotal))
+    rollup.write(session, batch_size)
+    session.commit()
+    return {'days': len(rollup.daily), 'tools': len(rollup.totals)}
+
+
+# Reads: only rollup rows, bounded by the window and the maintenance interval
+def tool_analytics(days=None, overdue_only=False, limit=100, session=None):
+    # Per tool: task hours / completions / issues in the last `days` days and
+    # all time, mean days between issues, and whether maintenance is overdue.
+    # Busiest tools (in the window) first.
+    session = session or db.session
+    config = current_app.config
+    days = days or config['ANALYTICS_WINDOW_DAYS']
+    today = date.today()
+    maintenance_cutoff = datetime.utcnow() - timedelta(days=config['MAINTENANCE_INTERVAL_DAYS'])
+    hours_limit = config['MAINTENANCE_INTERVAL_HOURS']
+
+    window = (select(ToolUsageDaily.tool_id,
+                     func.sum(ToolUsageDaily.busy_seconds).label('busy_seconds'),
+                     func.sum(ToolUsageDaily.tasks_completed).label('tasks_completed'),
+                     func.sum(ToolUsageDaily.issues_reported).label('issues_reported'))
+              .where(ToolUsageDaily.day > today - timedelta(days=days))
+              .group_by(ToolUsageDaily.tool_id).subquery())
+    # Only tools maintained within the interval can be overdue by hours, so
+    # this reads at most MAINTENANCE_INTERVAL_DAYS of rows per tool
+    since_maintenance = (select(ToolUsageDaily.tool_id, func.sum(ToolUsageDaily.busy_seconds).label('busy_seconds'))
+                         .join(Tool, Tool.id == ToolUsageDaily.tool_id)
+                         .where(Tool.last_maintenance >= maintenance_cutoff,
+                                ToolUsageDaily.day >= func.date(Tool.last_maintenance))
+                         .group_by(ToolUsageDaily.tool_id).subquery())
+    busy = func.coalesce(window.c.busy_seconds, 0)
+    query = (select(Tool.id, Tool.name, Tool.status, Tool.last_maintenance, busy.label('busy_seconds'),
+                    func.coalesce(window.c.tasks_completed, 0).label('tasks_completed'),
+                    func.coalesce(window.c.issues_reported, 0).label('issues_reported'),
+                    ToolUsageTotal.busy_seconds.label('total_busy_seconds'),
+                    ToolUsageTotal.tasks_completed.label('total_tasks_completed'),
+                    ToolUsageTotal.issues_reported.label('total_issues_reported'),
+                    ToolUsageTotal.first_issue_at, ToolUsageTotal.last_issue_at,
+                    func.coalesce(since_maintenance.c.busy_seconds, 0).label('busy_since_maintenance'))
+             .outerjoin(window, window.c.tool_id == Tool.id)
+             .outerjoin(ToolUsageTotal, ToolUsageTotal.tool_id == Tool.id)
+             .outerjoin(since_maintenance, since_maintenance.c.tool_id == Tool.id)
+             .where(Tool.status != 'Retired')
+             .order_by(busy.desc(), Tool.id).limit(limit))
+    if overdue_only:
+        query = query.where(or_(Tool.last_maintenance.is_(None), Tool.last_maintenance < maintenance_cutoff,
+                                func.coalesce(since_maintenance.c.busy_seconds, 0) >= hours_limit * 3600))
+
+    tools = []
+    for row in session.execute(query):
+        if row.last_maintenance is None or row.last_maintenance < maintenance_cutoff:
+            overdue = 'days'
+        elif row.busy_since_maintenance >= hours_limit * 3600:
+            overdue = 'hours'
+        else:
+            overdue = None
+        issues = row.total_issues_reported or 0
+        tools.append({
+            'id': row.id, 'name': row.name, 'status': row.status,
+            'hours': round(row.busy_seconds / 3600, 1),
+            'tasks_completed': row.tasks_completed,
+            'issues_reported': row.issues_reported,
+            'total_hours': round((row.total_busy_seconds or 0) / 3600, 1),
+            'total_tasks_completed': row.total_tasks_completed or 0,
+            'total_issues_reported': issues,
+            'mean_days_between_issues': (round((row.last_issue_at - row.first_issue_at).total_seconds()
+                                               / 86400 / (issues - 1), 1) if issues > 1 else None),
+            'last_maintenance': row.last_maintenance.isoformat() if row.last_maintenance else None,
+            'hours_since_maintenance': round(row.busy_since_maintenance / 3600, 1),
+            'maintenance_overdue': overdue, # None, 'days' or 'hours'
+        })
+    return tools
+
+
+def daily_totals(days=None, session=None):
+    # Whole-fleet task hours, completions and issues per day, oldest first
+    session = session or db.session
+    days = days or current_app.config['ANALYTICS_WINDOW_DAYS']
+    rows = session.execute(select(ToolUsageDaily.day, func.sum(ToolUsageDaily.busy_seconds),
+                                  func.sum(ToolUsageDaily.tasks_completed), func.sum(ToolUsageDaily.issues_reported))
+                           .where(ToolUsageDaily.day > date.today() - timedelta(days=days))
+                           .group_by(ToolUsageDaily.day).order_by(ToolUsageDaily.day))
+    return [{'day': day.isoformat(), 'hours': round(busy / 3600, 1), 'tasks_completed': tasks,
+             'issues_reported': issues} for day, busy, tasks, issues in rows]
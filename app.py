@@ -1,48 +1,129 @@
-from flask import Flask, render_template, redirect, url_for, flash, request
+from flask import (Flask, Blueprint, current_app, render_template, redirect, url_for, flash, request,
+                   jsonify, abort, Response, stream_with_context)
 from flask_login import LoginManager, login_user, logout_user, current_user, login_required
-from datetime import datetime
+import json
+import os
+import time
+import weakref
+import click
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Import from your new files
-from models import db, User, Tool, Task, ToolIssue, JobRequest # Added JobRequest
+from models import db, User, Tool, Task, ToolIssue, JobRequest, apply_sqlite_pragmas # Added JobRequest
 from forms import (RegistrationForm, LoginForm, AddToolForm, EditToolForm,
                    AssignTaskForm, UpdateTaskStatusForm, ReportIssueForm,
-                   JobRequestForm, OwnerActionJobRequestForm) # Added new forms
+                   JobRequestForm, OwnerActionJobRequestForm, # Added new forms
+                   prerender_select)
 from decorators import owner_required, worker_required
 from config import Config # Assuming you will use a config.py
-
-
-app = Flask(__name__)
-app.config.from_object(Config)
-
-db.init_app(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
+from pagination import keyset_page
+from stats import owner_dashboard_stats, worker_dashboard_stats, pending_job_requests
+from migrations import upgrade_db, explain_hot_queries
+from bulk import bulk_assign_tasks, bulk_update_task_status
+import scheduler
+from export import RESOURCES, fetch_page, stream_ndjson, stream_csv
+from passwords import HashingBusy, benchmark_verify
+from user_cache import get_session_user
+from reservations import acquire_tool, flag_maintenance, owner_status, retire_tool, set_task_status
+from events import broker, format_sse, queue_event, subscriber_filter
+from page_cache import cached_page, page_cache
+from assets import Assets, build_assets
+from jobs import jobs
+from instrumentation import Instrumentation
+import side_effects # Registers the background job handlers
+from archive import (archive_retired_tools, archive_finished, task_history, issue_history,
+                     job_request_history)
+import search
+from analytics import tool_analytics, daily_totals, rebuild_rollups
+from ratelimit import limiter
+
+
+# Every route and CLI command lives on this blueprint; create_app() builds the
+# application around it. `flask --app app ...` finds create_app() by itself.
+bp = Blueprint('main', __name__, cli_group=None)
+assets = Assets() # asset_url()/responsive_img() in templates, immutable /static/build/ headers
+instrumentation = Instrumentation() # Opt-in /metrics and header-triggered profiling
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Served from the in-process user cache; hits don't touch the database
+    return get_session_user(int(user_id))
+
+
+def create_app(config=None):
+    # Application factory; `config` (a dict) overrides Config. Nothing in here
+    # opens a database connection or starts a thread, so a preforking server
+    # can build the app once in its master process and fork the workers from it
+    # (see wsgi.py and gunicorn.conf.py).
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(config or {})
+    if app.config['TRUSTED_PROXIES']:
+        # Client address and scheme from the proxies' headers (per-IP rate limits, external URLs)
+        proxies = app.config['TRUSTED_PROXIES']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
+    db.init_app(app)
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+    _apps.add(app)
+
+    if app.config['ASSETS_BUILD_ON_STARTUP']:
+        _build_assets(app)
+    assets.init_app(app)
+    jobs.init_app(app) # Background side effects, run after the request's commit
+    instrumentation.init_app(app)
+    broker.init_app(app) # Live events: polls the shared event table while streams are open
+    limiter.init_app(app) # 429s and backpressure for the write forms
+    login_manager.init_app(app)
+    app.register_blueprint(bp)
+    return app
+
+# A forked worker must not reuse connections the parent may have opened
+# (preloading, or a CLI command that forks): drop them without closing the
+# parent's, and let the worker's pool connect afresh. One hook for the whole
+# process; apps that are gone drop out of the set.
+_apps = weakref.WeakSet()
+
+def _dispose_engines():
+    for app in list(_apps):
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+os.register_at_fork(after_in_child=_dispose_engines)
+
+def _build_assets(app):
+    return build_assets(app.static_folder, app.config['ASSET_IMAGE_WIDTHS'], app.config['ASSET_MAX_WIDTH'])
 
 # Routes
-@app.route('/')
+@bp.route('/')
+@cached_page()
 def home():
     # If user is logged in, go to their dashboard
     if current_user.is_authenticated:
         if current_user.role == 'owner':
-            return redirect(url_for('owner_dashboard'))
+            return redirect(url_for('main.owner_dashboard'))
         elif current_user.role == 'worker':
-            return redirect(url_for('worker_dashboard'))
+            return redirect(url_for('main.worker_dashboard'))
     
     # If user is NOT logged in, show the homepage
     return render_template('home.html')
 
-@app.route('/tractor')
+@bp.route('/tractor')
+@cached_page()
 def tractor():
     return render_template('tractor.html')
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
+@limiter.limit('REGISTER')
 def register():
     if current_user.is_authenticated:
-        return redirect(url_for('owner_dashboard') if current_user.role == 'owner' else url_for('worker_dashboard'))
+        return redirect(url_for('main.owner_dashboard') if current_user.role == 'owner' else url_for('main.worker_dashboard'))
     form = RegistrationForm()
     if form.validate_on_submit():
         username = form.username.data
@@ -51,84 +132,91 @@ def register():
         role = form.role.data
 
         new_user = User(username=username, email=email, role=role)
-        new_user.set_password(password)
+        try:
+            new_user.set_password(password)
+        except HashingBusy:
+            flash('The server is busy right now, please try again in a moment.', 'warning')
+            return render_template('register.html', form=form), 503
         db.session.add(new_user)
         db.session.commit()
         flash(f'Account created successfully for {username} as {role}!', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     return render_template('register.html', form=form)
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
+@limiter.limit('LOGIN')
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('owner_dashboard') if current_user.role == 'owner' else url_for('worker_dashboard'))
+        return redirect(url_for('main.owner_dashboard') if current_user.role == 'owner' else url_for('main.worker_dashboard'))
     form = LoginForm()
     if form.validate_on_submit():
         username = form.username.data
         password = form.password.data
         user = User.query.filter_by(username=username).first()
-        if user and user.check_password(password):
+        try:
+            valid = user is not None and user.check_password(password)
+            if valid and user.password_needs_rehash():
+                # Hash parameters changed since this password was set: upgrade it now
+                user.set_password(password)
+                db.session.commit()
+        except HashingBusy:
+            flash('The server is busy right now, please try again in a moment.', 'warning')
+            return render_template('login.html', form=form), 503
+        if valid:
             login_user(user)
             flash('Logged in successfully!', 'success')
             if user.role == 'owner':
-                return redirect(url_for('owner_dashboard'))
+                return redirect(url_for('main.owner_dashboard'))
             else:
-                return redirect(url_for('worker_dashboard'))
+                return redirect(url_for('main.worker_dashboard'))
         else:
             flash('Login Unsuccessful. Please check username and password', 'danger')
     return render_template('login.html', form=form)
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
     flash('You have been logged out.', 'info')
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
 # Owner Routes
-@app.route('/owner/dashboard')
+@bp.route('/owner/dashboard')
 @owner_required
+@cached_page('tool', 'task', 'issue', 'job_request')
 def owner_dashboard():
-    tools = Tool.query.all()
-    tasks = Task.query.all()
-    issues = ToolIssue.query.all()
-    job_requests = JobRequest.query.filter_by(status='Pending').order_by(JobRequest.requested_date.desc()).all() # Only show pending requests
-    workers = User.query.filter_by(role='worker').all()
-
-    # Statistics
-    total_tools = len(tools)
-    available_tools = len([tool for tool in tools if tool.status == 'Available'])
-    in_use_tools = len([tool for tool in tools if tool.status == 'In-Use'])
-    maintenance_tools = len([tool for tool in tools if tool.status == 'Maintenance'])
-
-    total_tasks = len(tasks)
-    pending_tasks = len([task for task in tasks if task.status == 'Pending'])
-    in_progress_tasks = len([task for task in tasks if task.status == 'In-Progress'])
-    completed_tasks = len([task for task in tasks if task.status == 'Completed'])
-
-    # Forms for owner actions on job requests
-    job_request_forms = {}
-    for req in job_requests:
-        form = OwnerActionJobRequestForm()
-        job_request_forms[req.id] = form
+    # Each section is keyset-paginated independently and eager-loads the
+    # relationships the template reads, so the page costs a fixed number of queries.
+    tools, next_tools = keyset_page(Tool.query.filter(Tool.status != 'Retired'), Tool.id,
+                                    after=request.args.get('tools_after', type=int),
+                                    descending=False)
+    tasks, next_tasks = keyset_page(
+        Task.query.options(joinedload(Task.assignee), joinedload(Task.tool)),
+        Task.id, after=request.args.get('tasks_after', type=int))
+    issues, next_issues = keyset_page(
+        ToolIssue.query.options(joinedload(ToolIssue.tool_affected), joinedload(ToolIssue.reporter)),
+        ToolIssue.id, after=request.args.get('issues_after', type=int))
+    job_requests, next_requests = keyset_page(pending_job_requests(), JobRequest.id,
+                                              after=request.args.get('requests_after', type=int))
+
+
+    # One form for owner actions, rendered once and reused on every request row
+    job_request_form = OwnerActionJobRequestForm()
 
     return render_template('owner/dashboard.html',
                            tools=tools,
                            tasks=tasks,
                            issues=issues,
                            job_requests=job_requests, # Pass job requests
-                           workers=workers,
-                           total_tools=total_tools,
-                           available_tools=available_tools,
-                           in_use_tools=in_use_tools,
-                           maintenance_tools=maintenance_tools,
-                           total_tasks=total_tasks,
-                           pending_tasks=pending_tasks,
-                           in_progress_tasks=in_progress_tasks,
-                           completed_tasks=completed_tasks,
-                           job_request_forms=job_request_forms) # Pass job request forms
-
-@app.route('/owner/add_tool', methods=['GET', 'POST'])
+                           next_tools=next_tools,
+                           next_tasks=next_tasks,
+                           next_issues=next_issues,
+                           next_requests=next_requests,
+                           # Statistics (GROUP BY status, independent of the visible pages)
+                           **owner_dashboard_stats(),
+                           job_request_form=job_request_form) # Pass job request form
+
+@bp.route('/owner/add_tool', methods=['GET', 'POST'])
 @owner_required
 def add_tool():
     form = AddToolForm()
@@ -139,38 +227,43 @@ def add_tool():
         db.session.add(new_tool)
         db.session.commit()
         flash('Tool added successfully!', 'success')
-        return redirect(url_for('owner_dashboard'))
+        return redirect(url_for('main.owner_dashboard'))
     return render_template('owner/add_tool.html', form=form)
 
-@app.route('/owner/edit_tool/<int:tool_id>', methods=['GET', 'POST'])
+@bp.route('/owner/edit_tool/<int:tool_id>', methods=['GET', 'POST'])
 @owner_required
 def edit_tool(tool_id):
-    tool = Tool.query.get_or_404(tool_id)
+    tool = Tool.query.filter(Tool.id == tool_id, Tool.status != 'Retired').first_or_404()
     form = EditToolForm(obj=tool)
     if form.validate_on_submit():
         tool.name = form.name.data
         tool.description = form.description.data
-        tool.status = form.status.data
+        tool.status = owner_status(form.status.data) # Resolved in the UPDATE against open tasks
         tool.last_maintenance = form.last_maintenance.data if form.last_maintenance.data else None
+        db.session.flush()
+        queue_event('tool', tool) # Reads back the resolved status for live dashboards
         db.session.commit()
         flash('Tool updated successfully!', 'success')
-        return redirect(url_for('owner_dashboard'))
+        return redirect(url_for('main.owner_dashboard'))
     return render_template('owner/edit_tool.html', form=form, tool=tool)
 
-@app.route('/owner/delete_tool/<int:tool_id>', methods=['POST'])
+@bp.route('/owner/delete_tool/<int:tool_id>', methods=['POST'])
 @owner_required
 def delete_tool(tool_id):
-    tool = Tool.query.get_or_404(tool_id)
-    # Also delete any tasks or issues associated with this tool to prevent foreign key errors
-    Task.query.filter_by(tool_id=tool.id).delete()
-    ToolIssue.query.filter_by(tool_id=tool.id).delete()
-    JobRequest.query.filter_by(tool_id=tool.id).delete() # Delete requests for this tool
-    db.session.delete(tool)
+    tool = Tool.query.filter(Tool.id == tool_id, Tool.status != 'Retired').first_or_404()
+    # Workers to notify once the delete has committed
+    affected = (db.session.query(Task.worker_id).filter_by(tool_id=tool.id)
+                .union(db.session.query(JobRequest.worker_id).filter_by(tool_id=tool.id)))
+    jobs.enqueue('tool_deleted', tool.id, tool.name, current_user.id, [worker_id for (worker_id,) in affected])
+    # Soft delete now (one row, short transaction); its tasks, issues and job
+    # requests move to the archive tables in batches in the background
+    retire_tool(tool.id)
+    jobs.enqueue('archive_retired_tool', tool.id)
     db.session.commit()
-    flash('Tool deleted successfully!', 'success')
-    return redirect(url_for('owner_dashboard'))
+    flash('Tool deleted successfully! Its history is being archived.', 'success')
+    return redirect(url_for('main.owner_dashboard'))
 
-@app.route('/owner/assign_task', methods=['GET', 'POST'])
+@bp.route('/owner/assign_task', methods=['GET', 'POST'])
 @owner_required
 def assign_task():
     form = AssignTaskForm()
@@ -183,25 +276,90 @@ def assign_task():
 
         new_task = Task(title=title, description=description, priority=priority, worker_id=worker_id)
         if tool_id:
+            # Atomic checkout: only one owner can take an Available tool
+            if not acquire_tool(tool_id, exclusive=True):
+                db.session.rollback()
+                flash('That tool is no longer available. Choose another tool or none.', 'danger')
+                return render_template('owner/assign_task.html', form=form)
             new_task.tool_id = tool_id
-            tool = Tool.query.get(tool_id)
-            if tool:
-                tool.status = 'In-Use'
         db.session.add(new_task)
         db.session.commit()
         flash('Task assigned successfully!', 'success')
-        return redirect(url_for('owner_dashboard'))
+        return redirect(url_for('main.owner_dashboard'))
     return render_template('owner/assign_task.html', form=form)
 
+def _bulk_items(key):
+    # Shared request parsing for the JSON bulk endpoints: {"<key>": [ {...}, ... ]}
+    payload = request.get_json(silent=True)
+    items = payload.get(key) if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, (jsonify(error=f'Expected a JSON object with a non-empty "{key}" list.'), 400)
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        return None, (jsonify(error=f"At most {current_app.config['BULK_MAX_ITEMS']} items per batch."), 413)
+    return items, None
+
+# Bulk assignment: one validation pass, one commit per batch, per-item errors
+@bp.route('/owner/assign_task/bulk', methods=['POST'])
+@owner_required
+def bulk_assign_task():
+    items, error = _bulk_items('tasks')
+    if error:
+        return error
+    created, errors = bulk_assign_tasks(items, current_user.id)
+    return jsonify(created=created, errors=errors), 201 if created else 400
+
+# Scheduler: preview a batch plan (no writes), then commit the previewed plan.
+# Preview body: {"tasks": [{"title", "priority", "needs_tool", ...}], "include_job_requests": true}
+@bp.route('/owner/schedule/preview', methods=['POST'])
+@owner_required
+def schedule_preview():
+    payload = request.get_json(silent=True)
+    tasks = payload.get('tasks', []) if isinstance(payload, dict) else None
+    if not isinstance(tasks, list):
+        return jsonify(error='Expected a JSON object with a "tasks" list.'), 400
+    if len(tasks) > current_app.config['BULK_MAX_ITEMS']:
+        return jsonify(error=f"At most {current_app.config['BULK_MAX_ITEMS']} items per batch."), 413
+    start = time.perf_counter()
+    assignments, unscheduled = scheduler.plan(tasks, bool(payload.get('include_job_requests')))
+    return jsonify(assignments=assignments, unscheduled=unscheduled,
+                   elapsed_ms=round((time.perf_counter() - start) * 1000, 1))
+
+@bp.route('/owner/schedule/commit', methods=['POST'])
+@owner_required
+def schedule_commit():
+    items, error = _bulk_items('assignments')
+    if error:
+        return error
+    created, errors = scheduler.commit(items, current_user.id)
+    return jsonify(created=created, errors=errors), 201 if created else 409
+
 # NEW ROUTE: Owner action on job request
-@app.route('/owner/process_job_request/<int:request_id>', methods=['POST'])
+@bp.route('/owner/process_job_request/<int:request_id>', methods=['POST'])
 @owner_required
 def process_job_request(request_id):
     job_request = JobRequest.query.get_or_404(request_id)
     form = OwnerActionJobRequestForm()
     if form.validate_on_submit():
         action = form.action.data
+        # Claim the request with one conditional UPDATE: of two owners acting on
+        # the same request (or a double submit) only the first gets a row back
+        claimed = db.session.execute(
+            update(JobRequest).where(JobRequest.id == request_id, JobRequest.status == 'Pending')
+                              .values(status='Approved' if action == 'approve' else 'Declined')
+                              .returning(JobRequest.id, JobRequest.status, JobRequest.worker_id),
+            execution_options={'synchronize_session': False}).first()
+        if claimed is None:
+            db.session.rollback()
+            flash(f"Job request '{job_request.title}' was already processed.", 'info')
+            return redirect(url_for('main.owner_dashboard'))
         if action == 'approve':
+            # If a tool was requested, count the new task on it (marks an Available
+            # tool In-Use); a tool in Maintenance or Retired since the request can't take it
+            if job_request.tool_id and not acquire_tool(job_request.tool_id, in_service=True):
+                db.session.rollback()
+                flash(f"The tool requested for '{job_request.title}' is no longer available. "
+                      "Decline the request or assign the task by hand.", 'danger')
+                return redirect(url_for('main.owner_dashboard'))
             # Create a new task based on the job request
             new_task = Task(
                 title=f"Worker Request: {job_request.title}",
@@ -211,78 +369,98 @@ def process_job_request(request_id):
                 tool_id=job_request.tool_id
             )
             db.session.add(new_task)
-            job_request.status = 'Approved'
+            db.session.flush()
+            jobs.enqueue('job_request_processed', job_request.id, current_user.id, new_task.id)
             flash(f"Job request '{job_request.title}' approved and converted to a task!", 'success')
-            # If a tool was requested, mark it as in-use
-            if job_request.tool and job_request.tool.status == 'Available':
-                job_request.tool.status = 'In-Use'
 
         elif action == 'decline':
-            job_request.status = 'Declined'
+            jobs.enqueue('job_request_processed', job_request.id, current_user.id)
             flash(f"Job request '{job_request.title}' declined.", 'info')
+        queue_event('job_request', dict(claimed._mapping))
         db.session.commit()
     else:
         for field, errors in form.errors.items():
             for error in errors:
                 flash(f"Error in {getattr(form, field).label.text}: {error}", 'danger')
-    return redirect(url_for('owner_dashboard'))
+    return redirect(url_for('main.owner_dashboard'))
+
+# Archived (cold) history, read on demand; the dashboards only show active work
+@bp.route('/owner/history')
+@owner_required
+def owner_history():
+    tasks, next_tasks = task_history(after=request.args.get('tasks_after', type=int))
+    issues, next_issues = issue_history(after=request.args.get('issues_after', type=int))
+    job_requests, next_requests = job_request_history(after=request.args.get('requests_after', type=int))
+    return render_template('owner/history.html', tasks=tasks, issues=issues, job_requests=job_requests,
+                           next_tasks=next_tasks, next_issues=next_issues, next_requests=next_requests)
+
+# Tool utilization and maintenance analytics, served from the daily rollups
+@bp.route('/owner/analytics')
+@owner_required
+def owner_analytics():
+    days = max(1, min(request.args.get('days', current_app.config['ANALYTICS_WINDOW_DAYS'], type=int), 366))
+    overdue = request.args.get('overdue') == '1'
+    return render_template('owner/analytics.html', days=days, overdue=overdue,
+                           tools=tool_analytics(days, overdue), daily=daily_totals(days))
 
 # Worker Routes
-@app.route('/worker/dashboard')
+@bp.route('/worker/dashboard')
 @worker_required
+@cached_page('task', 'tool', 'job_request')
 def worker_dashboard():
-    assigned_tasks = Task.query.filter_by(worker_id=current_user.id).order_by(Task.assigned_date.desc()).all()
+    assigned_tasks = (Task.query.options(joinedload(Task.tool)).filter_by(worker_id=current_user.id)
+                      .order_by(Task.assigned_date.desc()).all())
     available_tools = Tool.query.filter_by(status='Available').all()
     your_job_requests = JobRequest.query.filter_by(worker_id=current_user.id).order_by(JobRequest.requested_date.desc()).all() # Worker's own job requests
 
-    # Worker specific statistics
-    total_tasks = len(assigned_tasks)
-    pending_tasks = len([task for task in assigned_tasks if task.status == 'Pending'])
-    in_progress_tasks = len([task for task in assigned_tasks if task.status == 'In-Progress'])
-    completed_tasks = len([task for task in assigned_tasks if task.status == 'Completed'])
 
-    # Prepare forms for inline task status updates
-    task_forms = {}
-    for task in assigned_tasks:
-        form = UpdateTaskStatusForm(obj=task)
-        task_forms[task.id] = form
+    # One form for inline task status updates; the status select is pre-rendered
+    # once per possible value and picked per row by the task's current status
+    task_form = UpdateTaskStatusForm()
+    status_selects = prerender_select(task_form.status, onchange="this.form.submit()")
 
     return render_template('worker/dashboard.html',
                            assigned_tasks=assigned_tasks,
                            available_tools=available_tools,
                            your_job_requests=your_job_requests, # Pass worker's own job requests
-                           total_tasks=total_tasks,
-                           pending_tasks=pending_tasks,
-                           in_progress_tasks=in_progress_tasks,
-                           completed_tasks=completed_tasks,
-                           task_forms=task_forms)
+                           # Worker specific statistics
+                           **worker_dashboard_stats(current_user.id),
+                           task_form=task_form,
+                           status_selects=status_selects)
 
-@app.route('/worker/update_task/<int:task_id>', methods=['POST'])
+@bp.route('/worker/update_task/<int:task_id>', methods=['POST'])
 @worker_required
 def update_task(task_id):
     task = Task.query.get_or_404(task_id)
     if task.worker_id != current_user.id:
         flash('You are not authorized to update this task.', 'danger')
-        return redirect(url_for('worker_dashboard'))
+        return redirect(url_for('main.worker_dashboard'))
 
     form = UpdateTaskStatusForm()
     if form.validate_on_submit():
-        new_status = form.status.data
-        task.status = new_status
-        if new_status == 'Completed':
-            task.completed_date = datetime.utcnow()
-            if task.tool:
-                task.tool.status = 'Available'
+        # Conditional transition; frees the tool only if this request completed the task
+        set_task_status(task.id, form.status.data)
         db.session.commit()
         flash('Task status updated successfully!', 'success')
     else:
         for field, errors in form.errors.items():
             for error in errors:
                 flash(f"Error in {getattr(form, field).label.text}: {error}", 'danger')
-    return redirect(url_for('worker_dashboard'))
+    return redirect(url_for('main.worker_dashboard'))
 
-@app.route('/worker/report_issue', methods=['GET', 'POST'])
+# Bulk status changes for the worker's own tasks
+@bp.route('/worker/update_task/bulk', methods=['POST'])
+@worker_required
+def bulk_update_task():
+    items, error = _bulk_items('updates')
+    if error:
+        return error
+    updated, errors = bulk_update_task_status(items, current_user.id)
+    return jsonify(updated=updated, errors=errors), 200 if updated else 400
+
+@bp.route('/worker/report_issue', methods=['GET', 'POST'])
 @worker_required
+@limiter.limit('REPORT_ISSUE')
 def report_issue():
     form = ReportIssueForm()
 
@@ -312,21 +490,30 @@ def report_issue():
         )
 
         # Optionally mark tool as under maintenance
-        tool = Tool.query.get(tool_id)
-        if tool and tool.status != 'Maintenance':
-            tool.status = 'Maintenance'
+        flag_maintenance(tool_id)
 
         db.session.add(new_issue)
+        db.session.flush()
+        jobs.enqueue('issue_reported', new_issue.id) # Audit + owner notification, after commit
         db.session.commit()
         flash('Tool issue reported successfully!', 'success')
-        return redirect(url_for('worker_dashboard'))
+        return redirect(url_for('main.worker_dashboard'))
 
     return render_template('worker/report_issue.html', form=form, tools=tools)
 
 
+@bp.route('/worker/history')
+@worker_required
+def worker_history():
+    tasks, next_tasks = task_history(current_user.id, request.args.get('tasks_after', type=int))
+    job_requests, next_requests = job_request_history(current_user.id, request.args.get('requests_after', type=int))
+    return render_template('worker/history.html', tasks=tasks, job_requests=job_requests,
+                           next_tasks=next_tasks, next_requests=next_requests)
+
 # NEW ROUTE: Worker can request a job
-@app.route('/worker/request_job', methods=['GET', 'POST'])
+@bp.route('/worker/request_job', methods=['GET', 'POST'])
 @worker_required
+@limiter.limit('REQUEST_JOB')
 def request_job():
     form = JobRequestForm()
     if form.validate_on_submit():
@@ -338,12 +525,12 @@ def request_job():
         db.session.add(new_request)
         db.session.commit()
         flash('Your job request has been submitted to the owner for review!', 'success')
-        return redirect(url_for('worker_dashboard')) # THIS LINE changed
+        return redirect(url_for('main.worker_dashboard')) # THIS LINE changed
     return render_template('worker/request_job.html', form=form)
 
 # In your app.py, likely within the Worker Routes section
 
-@app.route('/worker/available_jobs')
+@bp.route('/worker/available_jobs')
 @worker_required
 def available_jobs():
     # Logic to fetch and display jobs that are available for workers to take
@@ -360,7 +547,7 @@ def available_jobs():
 
 # In your app.py, likely within the Worker Routes section
 
-@app.route('/worker/my_applications')
+@bp.route('/worker/my_applications')
 @worker_required
 def my_applications():
     # Logic to fetch and display job requests this worker has made
@@ -377,7 +564,7 @@ def my_applications():
     return render_template('worker/my_applications.html', worker_requests=worker_requests)
 # In your app.py, likely within the Worker Routes section
 
-@app.route('/worker/my_jobs') # Or /worker/assigned_tasks if that's more precise
+@bp.route('/worker/my_jobs') # Or /worker/assigned_tasks if that's more precise
 @worker_required
 def my_jobs(): # Or assigned_tasks
     # Logic to fetch and display jobs/tasks assigned to the current worker
@@ -385,8 +572,95 @@ def my_jobs(): # Or assigned_tasks
 
     return render_template('worker/my_jobs.html', assigned_tasks=assigned_tasks) # Or worker/assigned_tasks.html
 
+# Live dashboard updates: server-sent events fed by the broker, which reads the
+# changes every process commits. Each arrives as a small delta that
+# static/scripts.js applies.
+@bp.route('/events')
+@login_required
+def live_events():
+    if broker.subscriber_count() >= current_app.config['EVENT_STREAM_MAX_CLIENTS']:
+        return Response('retry: 30000\n\n', status=503, mimetype='text/event-stream')
+    subscription = broker.subscribe(subscriber_filter(current_user), current_app.config['EVENT_STREAM_QUEUE'],
+                                    stats=current_user.role == 'owner')
+    heartbeat = current_app.config['EVENT_STREAM_HEARTBEAT']
+
+    def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                item = subscription.get(heartbeat)
+                if subscription.overflowed:
+                    yield format_sse('reload', {})
+                    return
+                yield format_sse(*item) if item else ': keepalive\n\n'
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Page cache hit/miss counters
+@bp.route('/owner/cache_stats')
+@owner_required
+def cache_stats():
+    return jsonify(page_cache.stats())
+
+# Background job queue counters (pending / succeeded / retried / failed)
+@bp.route('/owner/job_stats')
+@owner_required
+def job_stats():
+    return jsonify(jobs.stats())
+
+# Read API: keyset-paginated JSON pages and streaming exports of tasks, tools,
+# issues and job requests
+@bp.route('/api/<resource>')
+@owner_required
+def api_list(resource):
+    if resource not in RESOURCES:
+        abort(404)
+    limit = max(1, min(request.args.get('limit', 100, type=int), current_app.config['API_MAX_PAGE_SIZE']))
+    items, next_after = fetch_page(resource, request.args.get('after', type=int), limit)
+    return jsonify(items=items, next_after=next_after)
+
+@bp.route('/api/<resource>/export.<fmt>')
+@owner_required
+def api_export(resource, fmt):
+    if resource not in RESOURCES or fmt not in ('ndjson', 'csv'):
+        abort(404)
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    if fmt == 'csv':
+        body, mimetype = stream_csv(resource, batch_size), 'text/csv'
+    else:
+        body, mimetype = stream_ndjson(resource, batch_size), 'application/x-ndjson'
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={resource}.{fmt}'})
+
+# The analytics page's data as JSON; ?days=, ?overdue=1, ?limit=
+@bp.route('/api/analytics/tools')
+@owner_required
+def api_tool_analytics():
+    days = max(1, min(request.args.get('days', current_app.config['ANALYTICS_WINDOW_DAYS'], type=int), 366))
+    limit = max(1, min(request.args.get('limit', 100, type=int), current_app.config['API_MAX_PAGE_SIZE']))
+    return jsonify(days=days, tools=tool_analytics(days, request.args.get('overdue') == '1', limit),
+                   daily=daily_totals(days))
+
+# Full-text search over tasks, tools, issues and job requests: best matches
+# first, `after` is the next_after cursor of the previous page
+@bp.route('/owner/search')
+@owner_required
+def search_records():
+    kind = request.args.get('kind') or None
+    if kind and kind not in search.KIND_CODES:
+        abort(400)
+    per_page = max(1, min(request.args.get('limit', 20, type=int), current_app.config['API_MAX_PAGE_SIZE']))
+    try:
+        items, next_after = search.search(request.args.get('q', ''), kind, request.args.get('after'), per_page)
+    except ValueError:
+        abort(400) # Malformed cursor
+    return jsonify(items=items, next_after=next_after)
+
 # In your app.py, you could add this
-@app.route('/profile', methods=['GET', 'POST'])
+@bp.route('/profile', methods=['GET', 'POST'])
 @login_required # Any logged-in user can view their profile
 def profile():
     # You might want a form here for editing profile details
@@ -395,27 +669,208 @@ def profile():
     #    current_user.email = form.email.data
     #    db.session.commit()
     #    flash('Profile updated!', 'success')
-    #    return redirect(url_for('profile'))
+    #    return redirect(url_for('main.profile'))
     
     return render_template('profile.html', user=current_user) # Or form=form
 
 
+# The CLI commands import their seed/benchmark/loadtest helpers when they run,
+# so serving processes never load them.
+
+# CLI: `flask --app app init-db` prepares a database for serving: creates or
+# upgrades the schema and adds the default accounts that are missing. Safe to
+# re-run; run it once per deploy, before the server starts (not in every worker).
+@bp.cli.command('init-db')
+@click.option('--no-default-users', is_flag=True, help="Don't create the admin/worker1 accounts.")
+def init_db_command(no_default_users):
+    from seed import ensure_default_users
+    applied = upgrade_db()
+    print(f"Applied: {', '.join(applied)}" if applied else "Database already up to date.")
+    if not no_default_users:
+        for username in ensure_default_users():
+            print(f"Default '{username}' account created.")
+
+# CLI: `flask --app app upgrade-db` adds missing tables/columns/indexes to an existing database
+@bp.cli.command('upgrade-db')
+def upgrade_db_command():
+    applied = upgrade_db()
+    print(f"Applied: {', '.join(applied)}" if applied else "Database already up to date.")
+
+# CLI: `flask --app app explain-queries` prints the query plan of each hot dashboard query
+@bp.cli.command('explain-queries')
+def explain_queries_command():
+    full_scans = 0
+    for name, (plan, full_scan) in explain_hot_queries().items():
+        full_scans += full_scan
+        print(f"{'FULL SCAN' if full_scan else 'ok':9}  {name}")
+        for line in plan:
+            print(f"           {line}")
+    if full_scans:
+        raise SystemExit(f"{full_scans} hot queries still do full table scans")
+
+# CLI: `flask --app app bench-login` measures password verification throughput
+@bp.cli.command('bench-login')
+@click.option('--requests', default=200, help='Total verifications.')
+@click.option('--threads', default=16, help='Concurrent callers.')
+def bench_login_command(requests, threads):
+    print(json.dumps(benchmark_verify(requests, threads), indent=2))
+
+# CLI: `flask --app app bench-writes` measures concurrent write throughput with
+# stock pool/pragma settings and with the configured ones, side by side. It
+# drops and recreates a table, so it never runs on the app's database: by
+# default it uses scratch SQLite files, or an empty scratch database given with
+# --database-url (e.g. to try a PostgreSQL server).
+@bp.cli.command('bench-writes')
+@click.option('--threads', default=8, help='Concurrent writers.')
+@click.option('--writes', default=400, help='Total write transactions.')
+@click.option('--database-url', help='Scratch database to benchmark instead of SQLite files.')
+def bench_writes_command(threads, writes, database_url):
+    from loadtest import compare_settings
+    if database_url == current_app.config['SQLALCHEMY_DATABASE_URI']:
+        raise SystemExit("--database-url must be a scratch database, not the app's own.")
+    try:
+        results = compare_settings(current_app.config['SQLALCHEMY_ENGINE_OPTIONS'],
+                                   current_app.config['SQLITE_PRAGMAS'], threads, writes, database_url)
+    except ValueError as error:
+        raise SystemExit(str(error))
+    print(f"{'setting':<14} {'before':>16} -> {'after':<16}")
+    for name in sorted(set(results['before']['settings']) | set(results['after']['settings'])):
+        print(f"{name:<14} {str(results['before']['settings'].get(name, '-')):>16} -> "
+              f"{str(results['after']['settings'].get(name, '-')):<16}")
+    print(json.dumps(results, indent=2))
+
+# CLI: `flask --app app stress-checkout` races threads for exclusive tool checkouts
+# on a scratch SQLite database and fails if any tool is ever held twice
+@bp.cli.command('stress-checkout')
+@click.option('--threads', default=16, help='Concurrent owners.')
+@click.option('--tools', default=10, help='Tools to fight over.')
+@click.option('--attempts', default=2000, help='Total checkout attempts.')
+def stress_checkout_command(threads, tools, attempts):
+    from loadtest import checkout_stress
+    results = checkout_stress(current_app.config['SQLALCHEMY_ENGINE_OPTIONS'], current_app.config['SQLITE_PRAGMAS'],
+                              threads, tools, attempts)
+    print(json.dumps(results, indent=2))
+    if results['double_checkouts'] or results['leaked_tools']:
+        raise SystemExit('Tool reservation invariant violated')
+
+
+# CLI: `flask --app app archive-retired` moves any remaining history of retired
+# tools into the archive tables (catch-up if a background archival was cut short)
+@bp.cli.command('archive-retired')
+def archive_retired_command():
+    moved = archive_retired_tools()
+    for tool_id, counts in moved.items():
+        print(f"tool {tool_id}: " + ', '.join(f"{name} {count}" for name, count in counts.items()))
+    if not moved:
+        print("No retired tools.")
+
+# CLI: `flask --app app archive-history` moves finished work past the retention
+# cutoff to the archive tables; run it periodically, e.g. nightly from cron
+@bp.cli.command('archive-history')
+@click.option('--days', type=int, default=None, help='Retention in days (default ARCHIVE_AFTER_DAYS).')
+def archive_history_command(days):
+    moved = archive_finished(days)
+    print(', '.join(f"{name} {count}" for name, count in moved.items()) + ' rows archived')
+
+# CLI: `flask --app app rebuild-search` refills the full-text index from the
+# tables (after restoring a backup or loading rows with raw SQL)
+@bp.cli.command('rebuild-search')
+def rebuild_search_command():
+    search.create_index()
+    if not search.index_available():
+        raise SystemExit("Full-text search needs SQLite with FTS5.")
+    start = time.perf_counter()
+    search.rebuild_index()
+    print(f"Search index rebuilt in {time.perf_counter() - start:.1f}s")
+
+# CLI: `flask --app app rebuild-analytics` recomputes the tool analytics rollups
+# from all task and issue history (they are otherwise kept up to date as work happens)
+@bp.cli.command('rebuild-analytics')
+def rebuild_analytics_command():
+    start = time.perf_counter()
+    counts = rebuild_rollups()
+    print(f"{counts['tools']} tools, {counts['days']} tool-days rebuilt in {time.perf_counter() - start:.1f}s")
+
+# CLI: `flask --app app bench-jobs` shows request latency vs side-effect cost,
+# with the side effects run inline and on the background job pool
+@bp.cli.command('bench-jobs')
+@click.option('--requests', default=40, help='Requests per side-effect cost.')
+def bench_jobs_command(requests):
+    from loadtest import side_effect_latency
+    print(json.dumps(side_effect_latency(current_app._get_current_object(), requests=requests), indent=2))
+
+# CLI: `flask --app app bench-ratelimit` floods /login with wrong passwords for
+# an existing user, without limits and then with them (from one IP and from many)
+@bp.cli.command('bench-ratelimit')
+@click.option('--username', default='admin', help='Existing user to attack.')
+@click.option('--clients', default=16, help='Concurrent clients.')
+@click.option('--requests', default=20, help='Logins per client.')
+def bench_ratelimit_command(username, clients, requests):
+    from loadtest import login_flood
+    if not User.query.filter_by(username=username).first():
+        raise SystemExit(f'No user {username!r}; run `flask --app app init-db` first.')
+    print(json.dumps(login_flood(current_app._get_current_object(), username, clients, requests), indent=2))
+
+# CLI: `flask --app app seed-farm` fills a scratch database with reproducible
+# synthetic data for benchmarks (all seeded users log in with seed.SEED_PASSWORD)
+@bp.cli.command('seed-farm')
+@click.option('--workers', default=50)
+@click.option('--tools', default=200)
+@click.option('--tasks', default=10000)
+@click.option('--issues', default=1000)
+@click.option('--job-requests', default=1000)
+@click.option('--seed', default=42, help='Random seed; same seed and volumes give the same data.')
+def seed_farm_command(workers, tools, tasks, issues, job_requests, seed):
+    from seed import seed_farm, OWNER_USERNAME
+    upgrade_db()
+    if User.query.filter_by(username=OWNER_USERNAME).first():
+        raise SystemExit('This database is already seeded; use a fresh DATABASE_URL.')
+    start = time.perf_counter()
+    added = seed_farm(workers, tools, tasks, issues, job_requests, seed)
+    print(f"Seeded {added} in {time.perf_counter() - start:.1f}s")
+
+# CLI: `flask --app app bench-routes` drives the real routes over a seeded
+# database and prints (or writes) latency percentiles, queries and memory as JSON
+@bp.cli.command('bench-routes')
+@click.option('--iterations', default=50, help='Timed requests per route.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Also write the JSON report here.')
+def bench_routes_command(iterations, output):
+    from benchmark import run_benchmark
+    report = json.dumps(run_benchmark(current_app._get_current_object(), iterations), indent=2)
+    print(report)
+    if output:
+        with open(output, 'w') as f:
+            f.write(report + '\n')
+
+# CLI: `flask --app app bench-boot` measures worker start-up: import and
+# create_app() time and peak memory in fresh interpreters, and the memory each
+# worker forked from this (preloaded) process adds on its own
+@bp.cli.command('bench-boot')
+@click.option('--runs', default=5, help='Fresh interpreters to time.')
+@click.option('--workers', default=4, help='Workers to fork from the preloaded app.')
+def bench_boot_command(runs, workers):
+    from benchmark import measure_boot
+    print(json.dumps(measure_boot(current_app._get_current_object(), runs, workers), indent=2))
+
+# CLI: `flask --app app build-assets` fingerprints static files into static/build/
+# with resized JPEG/WebP image variants, and prints the before/after byte sizes
+@bp.cli.command('build-assets')
+def build_assets_command():
+    report = _build_assets(current_app)
+    before = sum(item['original_bytes'] for item in report)
+    after = sum(item['largest_jpeg_bytes'] for item in report)
+    smallest = sum(item['smallest_webp_bytes'] for item in report)
+    for item in report:
+        print(f"{item['file']:<32} {item['original_bytes']:>10,} -> {item['largest_jpeg_bytes']:>10,} full-width jpeg"
+              f" / {item['smallest_webp_bytes']:>8,} smallest webp")
+    print(f"{'total':<32} {before:>10,} -> {after:>10,} full-width jpeg / {smallest:>8,} smallest webp")
+
 if __name__ == '__main__':
+    # Development server; a deploy runs `flask --app app init-db` and wsgi.py instead
+    from seed import ensure_default_users
+    app = create_app()
     with app.app_context():
-        db.create_all()
-        # Create default owner if not exists
-        if not User.query.filter_by(username='admin', role='owner').first():
-            admin_user = User(username='admin', email='admin@example.com', role='owner')
-            admin_user.set_password('admin123')
-            db.session.add(admin_user)
-            db.session.commit()
-            print("Default 'admin' owner account created.")
-        # Create default worker if not exists
-        if not User.query.filter_by(username='worker1', role='worker').first():
-            worker_user = User(username='worker1', email='worker1@example.com', role='worker')
-            worker_user.set_password('worker123')
-            db.session.add(worker_user)
-            db.session.commit()
-            print("Default 'worker1' worker account created.")
-
-    app.run(debug=True)
\ No newline at end of file
+        upgrade_db()
+        for username in ensure_default_users():
+            print(f"Default '{username}' account created.")
+    app.run(debug=True)
@@ -0,0 +1,93 @@
+# archive.py
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, insert, select
+from models import (db, User, Tool, Task, ToolIssue, JobRequest, ARCHIVE_TABLES,
+                    task_archive, tool_issue_archive, job_request_archive)
+from pagination import keyset_page
+from search import remove_rows
+from jobs import job
+
+# Moves rows out of the hot tables into their *_archive copies in bounded
+# batches: the history of retired tools, and (periodically) finished work past
+# the retention cutoff, so the dashboards' queries only see active work. Each
+# batch is its own short transaction (copy, delete, commit), so writers are
+# blocked for one batch at a time rather than for the whole move, and an
+# interrupted run simply continues where it stopped when re-run.
+
+
+def archive_rows(model, *criteria, batch_size=None, pause=None, session=None):
+    # Returns the number of rows moved
+    session = session or db.session
+    batch_size = batch_size or current_app.config['ARCHIVE_BATCH_SIZE']
+    pause = current_app.config['ARCHIVE_BATCH_PAUSE'] if pause is None else pause
+    table, archive = model.__table__, ARCHIVE_TABLES[model]
+    names = [column.name for column in table.columns]
+    moved = 0
+    while True:
+        ids = session.scalars(select(table.c.id).where(*criteria).order_by(table.c.id).limit(batch_size)).all()
+        if not ids:
+            return moved
+        session.execute(insert(archive).from_select(names, select(*table.columns).where(table.c.id.in_(ids))))
+        session.execute(delete(table).where(table.c.id.in_(ids)))
+        remove_rows(session, model, ids) # Archived rows drop out of search with the hot table
+        session.commit()
+        moved += len(ids)
+        if pause:
+            time.sleep(pause) # Let queued writers in between batches
+
+
+def archive_tool_history(tool_id, session=None):
+    # Everything that refers to a retired tool; returns {model name: rows moved}
+    return {model.__name__: archive_rows(model, model.tool_id == tool_id, session=session)
+            for model in (Task, ToolIssue, JobRequest)}
+
+
+@job
+def archive_retired_tool(tool_id):
+    archive_tool_history(tool_id)
+
+
+def archive_retired_tools(session=None):
+    # Catch-up for retired tools whose archival job never finished
+    session = session or db.session
+    retired = session.scalars(select(Tool.id).where(Tool.status == 'Retired').order_by(Tool.id)).all()
+    return {tool_id: archive_tool_history(tool_id, session) for tool_id in retired}
+
+
+def archive_finished(days=None, session=None):
+    # Completed tasks, resolved issues and decided job requests older than
+    # `days` (default ARCHIVE_AFTER_DAYS) go to the cold tables
+    days = current_app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    return {
+        'Task': archive_rows(Task, Task.status == 'Completed', Task.completed_date < cutoff, session=session),
+        # Issues have no resolved date; the report date is the closest bound
+        'ToolIssue': archive_rows(ToolIssue, ToolIssue.status == 'Resolved', ToolIssue.reported_date < cutoff,
+                                  session=session),
+        'JobRequest': archive_rows(JobRequest, JobRequest.status.in_(('Approved', 'Declined')),
+                                   JobRequest.requested_date < cutoff, session=session),
+    }
+
+
+# History views: keyset pages over the cold tables, read only on request
+def _history_page(archive, person_column, person_id, after):
+    query = (db.session.query(archive, User.username.label('person_name'), Tool.name.label('tool_name'))
+             .outerjoin(User, User.id == person_column)
+             .outerjoin(Tool, Tool.id == archive.c.tool_id))
+    if person_id is not None:
+        query = query.filter(person_column == person_id)
+    return keyset_page(query, archive.c.id, after=after)
+
+
+def task_history(worker_id=None, after=None):
+    return _history_page(task_archive, task_archive.c.worker_id, worker_id, after)
+
+
+def issue_history(reporter_id=None, after=None):
+    return _history_page(tool_issue_archive, tool_issue_archive.c.reporter_id, reporter_id, after)
+
+
+def job_request_history(worker_id=None, after=None):
+    return _history_page(job_request_archive, job_request_archive.c.worker_id, worker_id, after)
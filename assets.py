@@ -0,0 +1,164 @@
+# assets.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from flask import request, url_for
+from markupsafe import Markup, escape
+
+# Static asset pipeline. `flask build-assets` copies every static file to
+# static/build/ under a content-hashed name and, for images, writes resized
+# JPEG and WebP variants; manifest.json maps original paths to the built ones.
+# A build is staged in a temporary directory and only then moved into
+# static/build/, manifest last (an atomic rename), so a running server never
+# sees a half-built tree. Files from earlier builds stay: pages and caches
+# still referencing the old names keep working after a deploy.
+# Templates use asset_url()/responsive_img(), which fall back to the plain
+# static file when there is no manifest entry, so an unbuilt tree still works.
+
+BUILD_DIR = 'build'
+MANIFEST = 'manifest.json'
+IMAGE_EXTENSIONS = ('.jpeg', '.jpg', '.png')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def _digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:10]
+
+
+def _built_name(rel_path, digest, suffix='', ext=None):
+    stem, original_ext = os.path.splitext(rel_path)
+    return f"{stem}{suffix}.{digest}{ext or original_ext}"
+
+
+def _pillow():
+    # Imported only for a build, so serving processes don't load it. Optional:
+    # without Pillow only fingerprinted copies are built.
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def _save_variant(image, width, target, fmt, quality):
+    height = round(image.height * width / image.width)
+    resized = image if width == image.width else image.resize((width, height), _pillow().LANCZOS)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if fmt == 'JPEG':
+        resized.save(target, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        resized.save(target, 'WEBP', quality=quality, method=6)
+    return os.path.getsize(target)
+
+
+def build_assets(static_folder, widths=(320, 640, 1024), max_width=1600, jpeg_quality=78, webp_quality=72):
+    # Builds every static file into static/build; returns a per-file byte-size report
+    out_root = os.path.join(static_folder, BUILD_DIR)
+    stage = tempfile.mkdtemp(prefix='.build-', dir=static_folder) # Same filesystem, so renames are atomic
+    try:
+        report = _build_into(stage, static_folder, widths, max_width, jpeg_quality, webp_quality)
+        for folder, _, files in os.walk(stage):
+            target_folder = os.path.join(out_root, os.path.relpath(folder, stage))
+            os.makedirs(target_folder, exist_ok=True)
+            for name in files:
+                if name != MANIFEST:
+                    os.replace(os.path.join(folder, name), os.path.join(target_folder, name))
+        os.replace(os.path.join(stage, MANIFEST), os.path.join(out_root, MANIFEST))
+    finally:
+        shutil.rmtree(stage, ignore_errors=True)
+    return report
+
+
+def _build_into(stage, static_folder, widths, max_width, jpeg_quality, webp_quality):
+    # Writes the built files and manifest.json under `stage`; manifest paths
+    # stay relative to static_folder ("build/...")
+    Image = _pillow()
+    staged = lambda built: os.path.join(stage, os.path.relpath(built, BUILD_DIR))
+    manifest = {'files': {}, 'images': {}}
+    report = []
+    for folder, dirs, files in os.walk(static_folder):
+        if os.path.abspath(folder) == os.path.abspath(static_folder):
+            dirs[:] = [d for d in dirs if d != BUILD_DIR and not d.startswith('.build-')]
+        for name in sorted(files):
+            source = os.path.join(folder, name)
+            rel_path = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            digest = _digest(source)
+            built = f"{BUILD_DIR}/{_built_name(rel_path, digest)}"
+            os.makedirs(os.path.dirname(staged(built)), exist_ok=True)
+            shutil.copyfile(source, staged(built))
+            manifest['files'][rel_path] = built
+            original_size = os.path.getsize(source)
+            if Image is None or not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+
+            with Image.open(source) as image:
+                image = image.convert('RGB')
+                full_width = min(image.width, max_width)
+                variant_widths = sorted({w for w in widths if w < full_width} | {full_width})
+                variants = {'jpeg': [], 'webp': []}
+                for width in variant_widths:
+                    for fmt, ext, quality in (('JPEG', '.jpg', jpeg_quality), ('WEBP', '.webp', webp_quality)):
+                        target = f"{BUILD_DIR}/{_built_name(rel_path, digest, f'-{width}w', ext)}"
+                        size = _save_variant(image, width, staged(target), fmt, quality)
+                        if fmt == 'JPEG' and width == image.width and size >= original_size and name.lower().endswith(('.jpeg', '.jpg')):
+                            # Recompressing an already-small JPEG only made it bigger
+                            os.remove(staged(target))
+                            target, size = built, original_size
+                        variants[fmt.lower()].append([width, target, size])
+            manifest['images'][rel_path] = {'width': full_width, **variants}
+            report.append({
+                'file': rel_path,
+                'original_bytes': original_size,
+                'largest_jpeg_bytes': variants['jpeg'][-1][2],
+                'smallest_webp_bytes': variants['webp'][0][2],
+            })
+    with open(os.path.join(stage, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return report
+
+
+class Assets:
+    def __init__(self, app=None):
+        self.manifest = {'files': {}, 'images': {}}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        path = os.path.join(app.static_folder, BUILD_DIR, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+        app.jinja_env.globals.update(asset_url=self.asset_url, responsive_img=self.responsive_img)
+        static_prefix = f"{app.static_url_path}/{BUILD_DIR}/"
+
+        @app.after_request
+        def immutable_build_assets(response):
+            # Built files are content-addressed, so they never need revalidating
+            if request.path.startswith(static_prefix) and response.status_code == 200:
+                response.headers['Cache-Control'] = IMMUTABLE
+            return response
+
+    def asset_url(self, filename):
+        return url_for('static', filename=self.manifest['files'].get(filename, filename))
+
+    def responsive_img(self, filename, alt, sizes='100vw', loading='lazy', **attrs):
+        # <picture> with WebP + JPEG srcsets; plain <img> if the image wasn't built.
+        # Keyword args become <img> attributes (class_ -> class).
+        attrs['loading'] = loading
+        attrs = ''.join(f' {escape(key.rstrip("_"))}="{escape(value)}"' for key, value in attrs.items())
+        image = self.manifest['images'].get(filename)
+        if not image:
+            return Markup(f'<img src="{escape(self.asset_url(filename))}" alt="{escape(alt)}"{attrs}>')
+
+        def srcset(variants):
+            return ', '.join(f"{url_for('static', filename=path)} {width}w" for width, path, _ in variants)
+
+        default = image['jpeg'][-1][1]
+        return Markup(
+            f'<picture><source type="image/webp" srcset="{escape(srcset(image["webp"]))}" sizes="{escape(sizes)}">'
+            f'<img src="{escape(url_for("static", filename=default))}" srcset="{escape(srcset(image["jpeg"]))}"'
+            f' sizes="{escape(sizes)}" alt="{escape(alt)}"{attrs}></picture>'
+        )
@@ -0,0 +1,254 @@
+# benchmark.py
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import traceback
+from datetime import datetime
+from sqlalchemy import event, select
+from models import db, User, Tool, Task, JobRequest
+from seed import SEED_PASSWORD, OWNER_USERNAME, table_counts
+
+# Route benchmark over a seeded database (see seed.py): drives the real views
+# through the Flask test client and reports latency percentiles, SQL statements
+# per request and peak Python memory per request. It writes (assigns tasks,
+# moves statuses, processes job requests), so point it at a scratch database.
+# The page cache, rate limits and CSRF checks are switched off for the run so
+# every request does the full work.
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class _StatementCounter:
+    def __init__(self, engine):
+        self.engine, self.count = engine, 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+def _request(app, call, *args):
+    # A fresh app context per request, as when serving: the CLI's own context
+    # would otherwise share g (the logged-in user) and db.session across requests
+    with app.app_context():
+        return call(*args)
+
+
+def _login(client, username):
+    return client.post('/login', data={'username': username, 'password': SEED_PASSWORD})
+
+
+def _drop_flashes(client):
+    # POSTs flash a message; drop it so the session cookie doesn't grow per iteration
+    with client.session_transaction() as session:
+        session.pop('_flashes', None)
+
+
+def _scenarios(app, rng):
+    # name -> (client, function(iteration) making one request); setup is not timed
+    with app.app_context():
+        worker_name, worker_id = db.session.execute(
+            select(User.username, User.id).join(Task, Task.worker_id == User.id)
+            .where(User.role == 'worker').order_by(User.id).limit(1)).one()
+        worker_tasks = db.session.scalars(select(Task.id).where(Task.worker_id == worker_id)).all()
+        available_tools = db.session.scalars(select(Tool.id).where(Tool.status == 'Available')).all()
+        pending_requests = db.session.scalars(select(JobRequest.id).where(JobRequest.status == 'Pending')
+                                              .order_by(JobRequest.id.desc())).all()
+    owner, worker = app.test_client(), app.test_client()
+    _request(app, _login, owner, OWNER_USERNAME)
+    _request(app, _login, worker, worker_name)
+    _drop_flashes(owner)
+    _drop_flashes(worker)
+
+    def assign_task(n):
+        tool_id = available_tools.pop() if available_tools and n % 2 else 0 # Half check out a tool
+        return owner.post('/owner/assign_task', data={'title': f'Bench task {n}', 'description': 'benchmark',
+                                                      'priority': 'Medium', 'worker_id': worker_id,
+                                                      'tool_id': tool_id})
+
+    def update_task(n):
+        status = ('In-Progress', 'Completed', 'Pending')[n % 3]
+        return worker.post(f'/worker/update_task/{rng.choice(worker_tasks)}', data={'status': status})
+
+    def process_job_request(n):
+        if not pending_requests:
+            return None
+        return owner.post(f'/owner/process_job_request/{pending_requests.pop()}',
+                          data={'action': 'approve' if n % 2 else 'decline', 'new_task_priority': 'Low'})
+
+    return {
+        'login': (None, lambda n: _login(app.test_client(), worker_name)),
+        'owner_dashboard': (owner, lambda n: owner.get('/owner/dashboard')),
+        'worker_dashboard': (worker, lambda n: worker.get('/worker/dashboard')),
+        'assign_task': (owner, assign_task),
+        'update_task': (worker, update_task),
+        'process_job_request': (owner, process_job_request),
+    }
+
+
+def run_benchmark(app, iterations=50, memory_iterations=5, seed=1):
+    rng = random.Random(seed)
+    saved = {key: app.config.get(key, True) for key in ('WTF_CSRF_ENABLED', 'PAGE_CACHE_ENABLED', 'RATELIMIT_ENABLED')}
+    app.config.update(WTF_CSRF_ENABLED=False, PAGE_CACHE_ENABLED=False, RATELIMIT_ENABLED=False)
+    try:
+        with app.app_context():
+            engine = db.engine
+            counts = table_counts()
+        results = {}
+        for name, (client, request) in _scenarios(app, rng).items():
+            timings, statements, statuses = [], [], {}
+            for n in range(iterations):
+                with _StatementCounter(engine) as counter:
+                    start = time.perf_counter()
+                    response = _request(app, request, n)
+                    elapsed = time.perf_counter() - start
+                if response is None:
+                    break # Ran out of rows to act on (e.g. pending job requests)
+                timings.append(elapsed * 1000)
+                statements.append(counter.count)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if client is not None:
+                    _drop_flashes(client)
+
+            # Separate, shorter pass for memory: tracemalloc slows everything down
+            peaks = []
+            for n in range(iterations, iterations + memory_iterations):
+                gc.collect()
+                tracemalloc.start()
+                response = _request(app, request, n)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                if response is None:
+                    break
+                peaks.append(peak)
+                if client is not None:
+                    _drop_flashes(client)
+
+            timings.sort()
+            results[name] = {
+                'requests': len(timings),
+                'p50_ms': round(percentile(timings, 50), 2) if timings else None,
+                'p95_ms': round(percentile(timings, 95), 2) if timings else None,
+                'p99_ms': round(percentile(timings, 99), 2) if timings else None,
+                'queries_per_request': round(sum(statements) / len(statements), 1) if statements else None,
+                'max_queries': max(statements) if statements else None,
+                'peak_memory_kb': round(max(peaks) / 1024, 1) if peaks else None,
+                'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+            }
+    finally:
+        app.config.update(saved)
+    return {
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'database': engine.dialect.name,
+        'iterations': iterations,
+        'rows': counts,
+        'results': results,
+    }
+
+
+# Worker start-up. A fresh interpreter pays for imports and create_app() (and
+# the first request compiles templates and opens a connection); workers forked
+# from a preloaded app share those pages with the master, so what matters is
+# the private memory each one adds.
+BOOT_SCRIPT = """
+import json, resource, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+application.test_client().get('/login')
+served = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'create_app_ms': (created - imported) * 1000,
+                  'first_request_ms': (served - created) * 1000,
+                  'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def _memory_kb():
+    # (resident, private) kB of this process; Linux only
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+    return fields['Rss'], fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+
+
+def _forked_worker(app, requests):
+    # Child side: serve a few requests like a worker would, then report memory
+    client = app.test_client()
+    for _ in range(requests):
+        _request(app, client.get, '/login')
+    return _memory_kb()
+
+
+def measure_boot(app, runs=5, workers=4, requests=20):
+    here = os.path.dirname(os.path.abspath(__file__))
+    cold = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', BOOT_SCRIPT], cwd=here, check=True,
+                                capture_output=True, text=True).stdout
+        cold.append(json.loads(output.splitlines()[-1]))
+    report = {'fresh_interpreter': {key: round(sorted(run[key] for run in cold)[len(cold) // 2], 1)
+                                    for key in cold[0]}} # Medians
+
+    if hasattr(os, 'fork') and os.path.exists('/proc/self/smaps_rollup'):
+        gc.collect()
+        gc.freeze() # As gunicorn.conf.py does: keep the GC from dirtying shared pages
+        children = []
+        for _ in range(workers):
+            read_end, write_end = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                # Never return into the parent's code (the CLI, pytest) from
+                # here, whatever happens: a failed child just writes nothing
+                status = 1
+                try:
+                    os.close(read_end)
+                    rss, private = _forked_worker(app, requests)
+                    os.write(write_end, json.dumps([rss, private]).encode())
+                    status = 0
+                except BaseException:
+                    traceback.print_exc()
+                finally:
+                    os._exit(status)
+            os.close(write_end)
+            children.append((pid, read_end))
+        forked, failed = [], 0
+        for pid, read_end in children:
+            with os.fdopen(read_end) as f:
+                output = f.read()
+            _, status = os.waitpid(pid, 0)
+            if status or not output:
+                failed += 1
+            else:
+                forked.append(json.loads(output))
+        gc.unfreeze()
+        report['preforked_workers'] = {'workers': workers, 'failed': failed}
+        if forked:
+            report['preforked_workers'].update(
+                rss_mb=round(max(rss for rss, _ in forked) / 1024, 1),
+                private_mb=round(max(private for _, private in forked) / 1024, 1), # Memory each worker adds
+            )
+    return report
@@ -0,0 +1,197 @@
+# bulk.py
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import update
+from models import db, User, Tool, Task, JobRequest
+from events import queue_event
+from jobs import jobs
+from reservations import acquire_tool, release_tool, TOOL_RETURNING, TASK_RETURNING
+from analytics import record_task
+
+TASK_PRIORITIES = ('Low', 'Medium', 'High')
+TASK_STATUSES = ('Pending', 'In-Progress', 'Completed')
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def bulk_assign_tasks(items, actor_id=None):
+    # Validate a whole batch of task assignments with one lookup per referenced
+    # table, check out all requested tools with a single conditional UPDATE,
+    # insert the valid items and commit once. An item with a job_request_id
+    # approves that (still Pending) request of its worker. Returns
+    # (created_task_ids, errors); errors are {'index': i, 'errors': [...]} for
+    # each rejected item.
+    worker_ids = {_as_int(item.get('worker_id')) for item in items if isinstance(item, dict)}
+    tool_ids = {_as_int(item.get('tool_id')) for item in items if isinstance(item, dict) and item.get('tool_id')}
+    known_workers = {row[0] for row in db.session.query(User.id)
+                     .filter(User.id.in_(worker_ids - {None}), User.role == 'worker')}
+    known_tools = {row[0] for row in db.session.query(Tool.id).filter(Tool.id.in_(tool_ids - {None}))}
+
+    tasks, errors = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'errors': ['Item must be an object.']})
+            continue
+        item_errors = []
+        title = item.get('title') or ''
+        description = item.get('description')
+        priority = item.get('priority', 'Medium')
+        worker_id = _as_int(item.get('worker_id'))
+        tool_id = _as_int(item.get('tool_id')) if item.get('tool_id') else None
+        job_request_id = _as_int(item.get('job_request_id')) if item.get('job_request_id') else None
+        if item.get('job_request_id') and job_request_id is None:
+            item_errors.append('Invalid job request.')
+        if not isinstance(title, str):
+            item_errors.append('Title must be a string.')
+        elif not title.strip():
+            item_errors.append('Title is required.')
+        elif len(title.strip()) > 100:
+            item_errors.append('Title must be at most 100 characters.')
+        if description is not None and not isinstance(description, str):
+            item_errors.append('Description must be a string.')
+        if priority not in TASK_PRIORITIES:
+            item_errors.append(f"Priority must be one of {', '.join(TASK_PRIORITIES)}.")
+        if worker_id not in known_workers:
+            item_errors.append('Unknown worker.')
+        if item.get('tool_id') and tool_id not in known_tools:
+            item_errors.append('Unknown tool.')
+        if item_errors:
+            errors.append({'index': index, 'errors': item_errors})
+            continue
+        tasks.append((index, Task(title=title.strip(), description=description, priority=priority,
+                                  worker_id=worker_id, tool_id=tool_id), job_request_id))
+
+    # Atomic checkout of every requested tool that is still Available; an item
+    # whose tool was taken (by someone else or earlier in this batch) is
+    # rejected. Every checked-out tool goes to the first item asking for it.
+    wanted = {task.tool_id for _, task, _ in tasks if task.tool_id}
+    checked_out = set()
+    if wanted:
+        rows = db.session.execute(
+            update(Tool).where(Tool.id.in_(wanted), Tool.status == 'Available')
+                        .values(status='In-Use', in_use_count=Tool.in_use_count + 1)
+                        .returning(*TOOL_RETURNING),
+            execution_options={'synchronize_session': False}).all()
+        for row in rows:
+            queue_event('tool', dict(row._mapping))
+        checked_out = {row.id for row in rows}
+    accepted = []
+    for index, task, job_request_id in tasks:
+        if task.tool_id:
+            if task.tool_id not in checked_out:
+                errors.append({'index': index, 'errors': ['Tool is not available.']})
+                continue
+            checked_out.discard(task.tool_id)
+        accepted.append((index, task, job_request_id))
+
+    # Approve the job requests in one conditional UPDATE; an item whose request
+    # was already processed (or belongs to another worker) gives its tool back
+    request_ids = {job_request_id for _, _, job_request_id in accepted if job_request_id}
+    approved = {}
+    if request_ids:
+        rows = db.session.execute(
+            update(JobRequest).where(JobRequest.id.in_(request_ids), JobRequest.status == 'Pending')
+                              .values(status='Approved')
+                              .returning(JobRequest.id, JobRequest.status, JobRequest.worker_id),
+            execution_options={'synchronize_session': False}).all()
+        approved = {row.id: row for row in rows}
+    claimed, used = [], set()
+    for index, task, job_request_id in accepted:
+        row = approved.get(job_request_id)
+        if job_request_id and (job_request_id in used or row is None or row.worker_id != task.worker_id):
+            errors.append({'index': index, 'errors': ['Job request is not pending for this worker.']})
+            if task.tool_id:
+                release_tool(task.tool_id)
+            continue
+        if job_request_id:
+            used.add(job_request_id) # One task per request
+        claimed.append((task, job_request_id))
+    # Requests approved above but left without a task go back to Pending
+    orphaned = set(approved) - {job_request_id for _, job_request_id in claimed}
+    if orphaned:
+        db.session.execute(update(JobRequest).where(JobRequest.id.in_(orphaned)).values(status='Pending'),
+                           execution_options={'synchronize_session': False})
+    errors.sort(key=lambda error: error['index'])
+    accepted = [task for task, _ in claimed]
+
+    created = []
+    if accepted:
+        db.session.add_all(accepted)
+        db.session.flush() # Batched INSERT ... RETURNING; read ids before commit expires them
+        created = [task.id for task in accepted]
+        for task, job_request_id in claimed:
+            if job_request_id:
+                queue_event('job_request', dict(approved[job_request_id]._mapping))
+                jobs.enqueue('job_request_processed', job_request_id, actor_id, task.id)
+        db.session.commit()
+    else:
+        db.session.rollback()
+    return created, errors
+
+
+def bulk_update_task_status(items, worker_id):
+    # Apply a batch of {'task_id', 'status'} changes to the worker's own tasks
+    # with conditional set-based UPDATEs; only tasks that actually cross into or
+    # out of "Completed" release or re-acquire their tool (and book or take back
+    # its tool time). One commit.
+    # Returns (updated_task_ids, errors).
+    task_ids = {_as_int(item.get('task_id')) for item in items if isinstance(item, dict)}
+    owned = {row.id: row for row in db.session.query(Task.id, Task.assigned_date, Task.completed_date)
+             .filter(Task.id.in_(task_ids - {None}), Task.worker_id == worker_id)}
+
+    by_status, errors, seen = {}, [], set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'errors': ['Item must be an object.']})
+            continue
+        item_errors = []
+        task_id = _as_int(item.get('task_id'))
+        status = item.get('status')
+        if task_id not in owned:
+            item_errors.append('Task not found or not assigned to you.')
+        elif task_id in seen:
+            item_errors.append('Task appears more than once in this batch.')
+        if status not in TASK_STATUSES:
+            item_errors.append(f"Status must be one of {', '.join(TASK_STATUSES)}.")
+        if item_errors:
+            errors.append({'index': index, 'errors': item_errors})
+            continue
+        seen.add(task_id)
+        by_status.setdefault(status, []).append(task_id)
+
+    def move(condition, ids, **values):
+        rows = db.session.execute(update(Task).where(Task.id.in_(ids), condition).values(**values)
+                                              .returning(*TASK_RETURNING),
+                                  execution_options={'synchronize_session': False}).all()
+        for row in rows:
+            queue_event('task', dict(row._mapping))
+        return rows
+
+    def by_tool(rows):
+        return Counter(row.tool_id for row in rows if row.tool_id).items()
+
+    for status, ids in by_status.items():
+        if status == 'Completed':
+            completed = move(Task.status != 'Completed', ids, status=status, completed_date=datetime.utcnow())
+            for tool_id, count in by_tool(completed):
+                release_tool(tool_id, count)
+            for row in completed:
+                record_task(db.session, row.tool_id, row.assigned_date, row.completed_date)
+            continue
+        # Open tasks first: run after the reopen, this move would match the
+        # reopened rows again and update (and announce) them twice
+        move(Task.status != 'Completed', ids, status=status)
+        reopened = move(Task.status == 'Completed', ids, status=status, completed_date=None)
+        for tool_id, count in by_tool(reopened):
+            acquire_tool(tool_id, count=count)
+        for row in reopened:
+            before = owned[row.id]
+            record_task(db.session, row.tool_id, before.assigned_date, before.completed_date, sign=-1)
+    if by_status:
+        db.session.commit()
+    return sorted(seen), errors
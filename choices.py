@@ -0,0 +1,106 @@
+# choices.py
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+from models import db, User, Tool
+
+# Select-field option lists shared by the forms. The labels only carry what
+# rarely changes (tool names, worker usernames), not the tool's live status,
+# so checkouts and status changes leave the lists alone. Each list is stamped
+# with the version it was built at; committing a change to the set of tools or
+# workers (a row added, renamed, retired or deleted) bumps the version, so the
+# next form rebuilds the list once instead of on every request. Each app keeps
+# its lists in app.extensions['choices'].
+_lock = threading.Lock()
+
+
+def _state():
+    extensions = current_app.extensions
+    if 'choices' not in extensions:
+        with _lock:
+            extensions.setdefault('choices', {'version': 0, 'lists': {}}) # lists: name -> (version, built_at, choices)
+    return extensions['choices']
+
+
+def _ttl():
+    # Safety net for multi-process deployments, where another worker's commit
+    # does not bump this process's version.
+    return current_app.config.get('CHOICES_CACHE_TTL', 60)
+
+
+def _cached(name, build):
+    state = _state()
+    entry = state['lists'].get(name)
+    if entry and entry[0] == state['version'] and time.monotonic() - entry[1] < _ttl():
+        return list(entry[2])
+    version = state['version']
+    choices = build()
+    with _lock:
+        # Don't store a list that a concurrent commit has already made stale
+        if version == state['version']:
+            state['lists'][name] = (version, time.monotonic(), choices)
+    return list(choices)
+
+
+def tool_choices():
+    return _cached('tools', lambda: [
+        (tool_id, name)
+        for tool_id, name in db.session.query(Tool.id, Tool.name)
+                                       .filter(Tool.status != 'Retired').order_by(Tool.id)
+    ])
+
+
+def worker_choices():
+    return _cached('workers', lambda: [
+        (user_id, username)
+        for user_id, username in db.session.query(User.id, User.username)
+                                           .filter_by(role='worker').order_by(User.id)
+    ])
+
+
+def invalidate_choices():
+    state = _state()
+    with _lock:
+        state['version'] += 1
+        state['lists'].clear()
+
+
+def mark_choices_dirty(session=None):
+    # Bulk query.update()/delete() skip mapper events; call this after the ones
+    # that add, rename, retire or delete tools or workers.
+    (session or db.session).info['choices_dirty'] = True
+
+
+# Invalidation: mark the session when a Tool or User row is added or deleted,
+# or an update touches what the lists show, and bump the version only once
+# that transaction actually commits. Tools are retired with a Core UPDATE,
+# which calls mark_choices_dirty itself.
+LISTED = {Tool: ('name',), User: ('username', 'role')}
+
+def _mark_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        mark_choices_dirty(session)
+
+def _mark_dirty_if_listed(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if any(attrs[name].history.has_changes() for name in LISTED[type(target)]):
+        _mark_dirty(mapper, connection, target)
+
+for _model in LISTED:
+    event.listen(_model, 'after_insert', _mark_dirty)
+    event.listen(_model, 'after_update', _mark_dirty_if_listed)
+    event.listen(_model, 'after_delete', _mark_dirty)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _after_commit(session):
+    if session.info.pop('choices_dirty', False):
+        invalidate_choices()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('choices_dirty', None)
@@ -1,7 +1,130 @@
 import os
 
+
+def _database_url():
+    url = os.environ.get('DATABASE_URL') or 'sqlite:///site.db'
+    # Some hosts still hand out the old "postgres://" scheme, which SQLAlchemy rejects
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def _engine_options(url):
+    options = {
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1', # Drop dead connections before use
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)), # Seconds; stay under server idle timeouts
+    }
+    # In-memory SQLite runs on a single static connection, so sizing options don't apply
+    if url not in ('sqlite://', 'sqlite:///:memory:'):
+        options.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        )
+    return options
+
+
 class Config:
     # Use os.urandom(24) to generate a strong key
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'a_very_secret_and_complex_key_for_development'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///site.db'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = _database_url()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    # Applied to every new SQLite connection: WAL lets readers run alongside the
+    # single writer, and busy_timeout makes writers wait instead of failing with
+    # "database is locked". Ignored for other databases.
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    }
+    # Rows per section on the dashboards (keyset-paginated)
+    DASHBOARD_PAGE_SIZE = int(os.environ.get('DASHBOARD_PAGE_SIZE', 50))
+    # Max age (seconds) of cached tool/worker select options in forms
+    CHOICES_CACHE_TTL = int(os.environ.get('CHOICES_CACHE_TTL', 60))
+    # Max items accepted by the bulk assign/update endpoints
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 1000))
+    # Read API: max rows per JSON page, rows per batch when streaming exports
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    # Password hashing: werkzeug method string with explicit parameters (hashes
+    # made with other parameters are upgraded on the next successful login), and
+    # the bounded pool that runs the KDF off the request threads.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 32)) # Waiting logins beyond the workers
+    PASSWORD_HASH_WAIT = float(os.environ.get('PASSWORD_HASH_WAIT', 2.0)) # Seconds before answering "busy"
+    # Session user cache used by the Flask-Login user_loader
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 300)) # Seconds
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 4096)) # Users kept (LRU)
+    # Threads per server process (gunicorn.conf.py serves with this many)
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 8))
+    # Live dashboard event stream. Each open dashboard holds one of its
+    # process's threads for as long as it stays open, so by default only half
+    # of them stream and the rest keep serving pages; further dashboards get a
+    # 503 and retry later instead of starving the process
+    EVENT_STREAM_MAX_CLIENTS = int(os.environ.get('EVENT_STREAM_MAX_CLIENTS', max(1, WEB_THREADS // 2)))
+    EVENT_STREAM_QUEUE = int(os.environ.get('EVENT_STREAM_QUEUE', 256)) # Undelivered events before a client must reload
+    EVENT_STREAM_HEARTBEAT = int(os.environ.get('EVENT_STREAM_HEARTBEAT', 15)) # Seconds between keepalives
+    EVENT_POLL_INTERVAL = float(os.environ.get('EVENT_POLL_INTERVAL', 1.0)) # Seconds between reads of the shared event table
+    EVENT_STATS_INTERVAL = float(os.environ.get('EVENT_STATS_INTERVAL', 2.0)) # Min seconds between stat-card refreshes
+    # Rendered-page cache for home/tractor and the dashboards (ETag + 304)
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '1') == '1'
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 300)) # Keep well under the CSRF token lifetime
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 512))
+    PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    # Static asset pipeline (`flask build-assets`): widths of the resized image
+    # variants, and whether to (re)build static/build/ when the app starts
+    ASSET_IMAGE_WIDTHS = tuple(int(w) for w in os.environ.get('ASSET_IMAGE_WIDTHS', '320,640,1024').split(','))
+    ASSET_MAX_WIDTH = int(os.environ.get('ASSET_MAX_WIDTH', 1600)) # Larger originals are scaled down
+    ASSETS_BUILD_ON_STARTUP = os.environ.get('ASSETS_BUILD_ON_STARTUP', '0') == '1'
+    # Background jobs for request side effects: 'thread' (local pool) or 'inline'
+    JOB_BACKEND = os.environ.get('JOB_BACKEND', 'thread')
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+    JOB_RETRY_DELAY = float(os.environ.get('JOB_RETRY_DELAY', 0.5)) # Seconds; doubles on each retry
+    JOB_DRAIN_TIMEOUT = float(os.environ.get('JOB_DRAIN_TIMEOUT', 10)) # Seconds to finish queued jobs at exit
+    # Archival of retired tools' history: rows per batch (one short transaction
+    # each) and the pause between batches that lets other writers in
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+    ARCHIVE_BATCH_PAUSE = float(os.environ.get('ARCHIVE_BATCH_PAUSE', 0.05)) # Seconds
+    # Finished work (completed tasks, resolved issues, decided job requests)
+    # older than this moves to the archive tables on `flask archive-history`
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+    # Request instrumentation (off by default): Prometheus text at /metrics,
+    # optionally behind "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # With metrics on, a request sending PROFILE_HEADER: PROFILE_TOKEN runs under
+    # cProfile; stats go to PROFILE_DIR (default instance/profiles)
+    PROFILE_HEADER = os.environ.get('PROFILE_HEADER', 'X-Profile')
+    PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')
+    # Tool analytics (/owner/analytics): default window in days, and when a tool
+    # is overdue for maintenance (days since the last one, or task hours since)
+    ANALYTICS_WINDOW_DAYS = int(os.environ.get('ANALYTICS_WINDOW_DAYS', 30))
+    MAINTENANCE_INTERVAL_DAYS = int(os.environ.get('MAINTENANCE_INTERVAL_DAYS', 180))
+    MAINTENANCE_INTERVAL_HOURS = int(os.environ.get('MAINTENANCE_INTERVAL_HOURS', 250))
+    # Rate limits for the write forms: "<requests>/<seconds>" token buckets per
+    # client IP (login, register) or per user (job requests, issue reports).
+    # 'memory' buckets are per process; 'database' shares them between workers
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', '1') == '1'
+    RATELIMIT_BACKEND = os.environ.get('RATELIMIT_BACKEND', 'memory')
+    RATELIMIT_LOGIN = os.environ.get('RATELIMIT_LOGIN', '10/60')
+    RATELIMIT_REGISTER = os.environ.get('RATELIMIT_REGISTER', '5/600')
+    RATELIMIT_REQUEST_JOB = os.environ.get('RATELIMIT_REQUEST_JOB', '30/600')
+    RATELIMIT_REPORT_ISSUE = os.environ.get('RATELIMIT_REPORT_ISSUE', '30/600')
+    RATELIMIT_MAX_KEYS = int(os.environ.get('RATELIMIT_MAX_KEYS', 100000)) # Clients tracked per process (memory)
+    # Backpressure: limited POSTs handled at once per process; one more waits
+    # this many seconds for a slot, then gets a 503 instead of queueing
+    RATELIMIT_MAX_CONCURRENT = int(os.environ.get('RATELIMIT_MAX_CONCURRENT', 4))
+    RATELIMIT_CONCURRENCY_WAIT = float(os.environ.get('RATELIMIT_CONCURRENCY_WAIT', 0.5))
+    # Reverse proxies in front of the app (nginx, a load balancer) that set
+    # X-Forwarded-For/-Proto. Behind one, set this to how many there are, or
+    # every client shares the proxy's address and its per-IP rate limits;
+    # leave it at 0 when clients connect directly, or they could forge it.
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+    # Identifies the deployed release (e.g. the git commit). It is part of every
+    # cached page's ETag, together with a hash of the templates and the asset
+    # manifest, so browsers don't keep revalidating old pages after a deploy
+    RELEASE_ID = os.environ.get('RELEASE_ID', '')
@@ -8,7 +8,7 @@ def owner_required(f):
     def decorated_function(*args, **kwargs):
         if current_user.role != 'owner':
             flash('Access denied: Owners only.', 'danger')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -18,6 +18,6 @@ def worker_required(f):
     def decorated_function(*args, **kwargs):
         if current_user.role != 'worker':
             flash('Access denied: Workers only.', 'danger')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     return decorated_function
\ No newline at end of file
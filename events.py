@@ -0,0 +1,262 @@
+# events.py
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Session, object_session
+from models import db, Tool, Task, ToolIssue, JobRequest, LiveEvent
+from stats import owner_dashboard_stats
+
+log = logging.getLogger(__name__)
+
+# Pub/sub behind the dashboards' server-sent event stream. Writes queue small
+# row deltas on the session; before it commits they go into the live_event
+# table, in the same transaction, so a rolled-back write never shows up. Every
+# server process with open streams polls that table (EVENT_POLL_INTERVAL) and
+# hands new rows to its own subscribers, so a dashboard sees the changes
+# committed by any worker, about a poll interval later.
+
+# Ids can become visible out of order (PostgreSQL hands them out before the
+# commit), so a poller only stops looking below an id this long after it saw it
+POLL_GRACE = 10 # Seconds
+EVENT_RETENTION = timedelta(minutes=5) # Older rows are pruned by the writers
+
+# Fields sent per changed row, keyed by event type
+DELTA_FIELDS = {
+    'tool': ('id', 'status', 'in_use_count'),
+    'task': ('id', 'status', 'worker_id', 'tool_id', 'completed_date'),
+    'issue': ('id', 'status', 'tool_id'),
+    'job_request': ('id', 'status', 'worker_id'),
+}
+MODEL_TYPES = {Tool: 'tool', Task: 'task', ToolIssue: 'issue', JobRequest: 'job_request'}
+
+
+class Subscription:
+    def __init__(self, feed, accepts, maxsize, stats=False):
+        self.feed = feed # Where it is registered; a closing stream may have no app context
+        self.accepts = accepts
+        self.stats = stats # Shows the owner stat cards
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False # A client too slow to keep up is told to reload
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Feed:
+    # One app's subscriptions and its poller over that app's event table
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._poller = None
+        self._cursor = None # Highest id known to be delivered or skipped
+        self._seen = set() # Delivered ids above the cursor
+        self._marks = deque() # (poll time, highest id read then)
+        self._stats_due = False
+        self._stats_at = None # monotonic time the stat cards were last computed
+        self.pruned_at = 0.0 # monotonic time of this process's last prune of old rows
+
+    def subscribe(self, accepts, maxsize=256, stats=False):
+        subscription = Subscription(self, accepts, maxsize, stats)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            # Started by the first stream, so in the worker process, never in a preloading master
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._poll_forever, name='live-events', daemon=True)
+                self._poller.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+    def publish(self, events):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            for item in events:
+                if not subscription.accepts(item):
+                    continue
+                try:
+                    subscription.queue.put_nowait(item)
+                except queue.Full:
+                    subscription.overflowed = True
+                    break
+
+    def _poll_forever(self):
+        while True:
+            time.sleep(self.app.config['EVENT_POLL_INTERVAL'])
+            if not self._subscriptions:
+                self._cursor = None # Idle: don't replay what happened meanwhile
+                continue
+            try:
+                with self.app.app_context():
+                    self.poll()
+            except Exception:
+                log.exception('Reading live events failed')
+
+    def poll(self):
+        # Publishes the rows committed since the last poll
+        with Session(db.engine) as session:
+            if self._cursor is None:
+                self._cursor = session.scalar(select(func.max(LiveEvent.id))) or 0
+                self._seen.clear()
+                self._marks.clear()
+                return
+            rows = session.execute(select(LiveEvent.id, LiveEvent.kind, LiveEvent.data)
+                                   .where(LiveEvent.id > self._cursor).order_by(LiveEvent.id)).all()
+            fresh = [row for row in rows if row.id not in self._seen]
+            events = [(row.kind, json.loads(row.data)) for row in fresh]
+            # Stat cards: only for owner streams, recomputed at most once per
+            # EVENT_STATS_INTERVAL however many commits arrive meanwhile
+            now = time.monotonic()
+            self._stats_due = self._stats_due or bool(events)
+            interval = self.app.config['EVENT_STATS_INTERVAL']
+            if (self._stats_due and (self._stats_at is None or now - self._stats_at >= interval)
+                    and any(subscription.stats for subscription in list(self._subscriptions))):
+                events.append(('stats', owner_dashboard_stats(session)))
+                self._stats_due, self._stats_at = False, now
+            if events:
+                self.publish(events)
+        self._seen.update(row.id for row in fresh)
+        self._marks.append((now, rows[-1].id if rows else self._cursor))
+        while self._marks and now - self._marks[0][0] > POLL_GRACE:
+            self._cursor = max(self._cursor, self._marks.popleft()[1])
+        self._seen = {row_id for row_id in self._seen if row_id > self._cursor}
+
+
+class Broker:
+    # One instance serves any number of apps; each app keeps its own Feed
+    # (subscriptions, poller, cursor) in app.extensions['live_events']
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['live_events'] = Feed(app)
+
+    def _feed(self):
+        return current_app.extensions['live_events']
+
+    def subscribe(self, accepts, maxsize=256, stats=False):
+        return self._feed().subscribe(accepts, maxsize, stats)
+
+    def unsubscribe(self, subscription):
+        subscription.feed.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        return self._feed().subscriber_count()
+
+    def poll(self):
+        self._feed().poll()
+
+
+broker = Broker()
+
+
+def json_value(value):
+    # JSON-safe column value (datetimes as ISO 8601); also used by export.py
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def queue_event(kind, row, session=None):
+    # row: an ORM object or a mapping with (at least) the DELTA_FIELDS of `kind`
+    fields = DELTA_FIELDS[kind]
+    if isinstance(row, dict):
+        data = {field: json_value(value) for field, value in row.items() if field in fields or field == 'created'}
+    else:
+        data = {field: json_value(getattr(row, field)) for field in fields}
+    (session or db.session).info.setdefault('live_events', []).append((kind, data))
+
+
+def format_sse(kind, data):
+    return f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+
+
+# Deltas for ORM writes; bulk/conditional UPDATEs call queue_event themselves
+def _row_changed(mapper, connection, target, created=False):
+    session = object_session(target)
+    if session is not None:
+        # Only already-loaded values: no SQL through the session inside a
+        # flush, and attributes set to SQL expressions stay expired until
+        # someone reads them back
+        kind = MODEL_TYPES[type(target)]
+        loaded = inspect(target).dict
+        data = {field: loaded[field] for field in DELTA_FIELDS[kind] if field in loaded}
+        _add_owner(connection, target, data)
+        if created:
+            data['created'] = True # Clients can't render a new row, they offer a reload
+        queue_event(kind, data, session)
+
+def _row_created(mapper, connection, target):
+    _row_changed(mapper, connection, target, created=True)
+
+def _row_deleted(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        data = {'id': target.id, 'deleted': True}
+        _add_owner(connection, target, data)
+        session.info.setdefault('live_events', []).append((MODEL_TYPES[type(target)], data))
+
+def _add_owner(connection, target, data):
+    # Workers' streams only get deltas carrying their own worker_id, so tasks
+    # and requests always send it, read on the flush's connection if expired
+    if isinstance(target, (Task, JobRequest)) and data.get('worker_id') is None:
+        worker_id = inspect(target).dict.get('worker_id')
+        if worker_id is None:
+            table = type(target).__table__
+            worker_id = connection.scalar(select(table.c.worker_id).where(table.c.id == target.id))
+        data['worker_id'] = worker_id
+
+for _model in MODEL_TYPES:
+    event.listen(_model, 'after_insert', _row_created)
+    event.listen(_model, 'after_update', _row_changed)
+    event.listen(_model, 'after_delete', _row_deleted)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _before_commit(session):
+    session.flush() # Rows flushed by the commit itself still queue their deltas
+    events = session.info.get('live_events')
+    if not events:
+        return
+    now = datetime.utcnow()
+    session.execute(insert(LiveEvent), [{'kind': kind, 'data': json.dumps(data), 'created_at': now}
+                                        for kind, data in events])
+    feed = current_app.extensions['live_events']
+    if time.monotonic() - feed.pruned_at > 60:
+        feed.pruned_at = time.monotonic()
+        session.execute(delete(LiveEvent).where(LiveEvent.created_at < now - EVENT_RETENTION))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _after_commit(session):
+    session.info.pop('live_events', None)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('live_events', None)
+
+
+def subscriber_filter(user):
+    # Owners see everything; workers see tool changes and their own
+    # tasks/requests. Anything else, including a delta without a worker_id, is
+    # withheld.
+    if user.role == 'owner':
+        return lambda item: True
+    own = ('task', 'job_request')
+    return lambda item: (item[0] == 'tool'
+                         or (item[0] in own and item[1].get('worker_id') == user.id))
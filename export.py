@@ -0,0 +1,58 @@
+# export.py
+import csv
+import io
+import json
+from events import json_value
+from models import db, Tool, Task, ToolIssue, JobRequest
+from pagination import keyset_page
+
+# Exported columns per API resource. Only these columns are selected, so rows
+# come back as plain tuples instead of ORM objects.
+RESOURCES = {
+    'tasks': (Task, ['id', 'title', 'description', 'priority', 'status', 'assigned_date',
+                     'completed_date', 'worker_id', 'tool_id']),
+    'tools': (Tool, ['id', 'name', 'description', 'status', 'last_maintenance']),
+    'issues': (ToolIssue, ['id', 'title', 'description', 'reported_date', 'status',
+                           'reporter_id', 'tool_id']),
+    'job_requests': (JobRequest, ['id', 'title', 'description', 'requested_date', 'status',
+                                  'worker_id', 'tool_id']),
+}
+
+
+def fetch_page(resource, after=None, limit=500):
+    # One keyset page of rows as dicts, plus the cursor for the next page (None at the end)
+    model, fields = RESOURCES[resource]
+    query = db.session.query(*[getattr(model, field) for field in fields])
+    rows, next_after = keyset_page(query, model.id, after, limit, descending=False)
+    return [{field: json_value(value) for field, value in zip(fields, row)} for row in rows], next_after
+
+
+def iter_rows(resource, batch_size=1000):
+    # Walks the whole table in keyset batches: memory stays at one batch and no
+    # cursor or transaction is held open between batches.
+    after = None
+    while True:
+        items, after = fetch_page(resource, after, batch_size)
+        yield from items
+        db.session.rollback() # End the read transaction between batches
+        if after is None:
+            return
+
+
+def stream_ndjson(resource, batch_size=1000):
+    for item in iter_rows(resource, batch_size):
+        yield json.dumps(item) + '\n'
+
+
+def stream_csv(resource, batch_size=1000):
+    fields = RESOURCES[resource][1]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for item in iter_rows(resource, batch_size):
+        writer.writerow([item[field] for field in fields])
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -2,7 +2,8 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, SelectField, TextAreaField, DateField
 from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError
-from models import User, Tool # Import your models here
+from models import User # Import your models here
+from choices import tool_choices, worker_choices
 
 class RegistrationForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired(), Length(min=2, max=20)])
@@ -50,9 +51,20 @@ class AssignTaskForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super(AssignTaskForm, self).__init__(*args, **kwargs)
-        # Re-fetch choices to ensure they are up-to-date
-        self.worker_id.choices = [(worker.id, worker.username) for worker in User.query.filter_by(role='worker').all()]
-        self.tool_id.choices.extend([(tool.id, f"{tool.name} ({tool.status})") for tool in Tool.query.all()])
+        # Cached option lists, rebuilt only after a tool/user change is committed
+        self.worker_id.choices = worker_choices()
+        self.tool_id.choices = [(0, '-- No specific tool --')] + tool_choices()
+
+def prerender_select(field, **render_kw):
+    # Render a select once per choice (with that choice selected) so table rows
+    # can reuse the markup instead of each building its own form instance.
+    original = field.data
+    rendered = {}
+    for value, _label in field.choices:
+        field.data = value
+        rendered[value] = field(**render_kw)
+    field.data = original
+    return rendered
 
 class UpdateTaskStatusForm(FlaskForm):
     status = SelectField('Status', choices=[('Pending', 'Pending'), ('In-Progress', 'In-Progress'), ('Completed', 'Completed')], validators=[DataRequired()])
@@ -66,7 +78,7 @@ class ReportIssueForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super(ReportIssueForm, self).__init__(*args, **kwargs)
-        self.tool_id.choices = [(tool.id, f"{tool.name} ({tool.status})") for tool in Tool.query.all()]
+        self.tool_id.choices = tool_choices()
 
 
 # NEW FORM: JobRequestForm
@@ -78,7 +90,7 @@ class JobRequestForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super(JobRequestForm, self).__init__(*args, **kwargs)
-        self.tool_id.choices.extend([(tool.id, f"{tool.name} ({tool.status})") for tool in Tool.query.all()])
+        self.tool_id.choices = [(0, '-- No specific tool --')] + tool_choices()
 
 # NEW FORM: OwnerActionJobRequestForm
 class OwnerActionJobRequestForm(FlaskForm):
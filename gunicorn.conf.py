@@ -0,0 +1,32 @@
+# gunicorn.conf.py
+import gc
+import os
+from config import Config
+
+# `gunicorn -c gunicorn.conf.py wsgi:app`. The app is imported and built once
+# in the master (preload_app) and the workers are forked from it, so they boot
+# in milliseconds and share the master's memory for code and templates;
+# app.py registers an at-fork hook that gives each worker its own database
+# connections.
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+# Threads per worker: the live event stream (/events) holds one for as long as
+# a dashboard is open, so plain sync workers would run out quickly. The app
+# caps streams per process below this (EVENT_STREAM_MAX_CLIENTS).
+worker_class = 'gthread'
+threads = Config.WEB_THREADS
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 15)) # > JOB_DRAIN_TIMEOUT: queued jobs finish on restart
+# Recycle workers now and then so slow leaks can't pile up; jitter keeps them
+# from all restarting at once
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 500))
+
+
+def when_ready(server):
+    # Objects loaded by the master stay put: without this the workers' garbage
+    # collector writes to them and copies every shared page it touches
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,180 @@
+# instrumentation.py
+import cProfile
+import os
+import threading
+import time
+from datetime import datetime
+from flask import Response, abort, g, has_request_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+from models import db
+
+# Opt-in request metrics (METRICS_ENABLED): per-endpoint latency histograms,
+# SQL statement count/time per request (engine events) and template render
+# time, served in Prometheus text format at /metrics. Counters live in this
+# process, so with several workers each one reports its own share; scrape them
+# individually or run a single worker while investigating.
+#
+# A request carrying the PROFILE_HEADER with the PROFILE_TOKEN value is also
+# run under cProfile and its stats written to PROFILE_DIR (X-Profile-File).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+def _label_value(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_label_value(value)}"' for name, value in zip(names, values))
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name, self.help_text, self.label_names, self.buckets = name, help_text, label_names, buckets
+        self.series = {} # label values -> [per-bucket counts, sum, count]
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            base = _labels(self.label_names, labels)
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{base}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{base}}} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name, self.help_text, self.label_names = name, help_text, label_names
+        self.series = {}
+
+    def inc(self, labels, value=1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.series.items()):
+            lines.append(f'{self.name}{{{_labels(self.label_names, labels)}}} {value:g}')
+        return lines
+
+
+class Instrumentation:
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._profiling = threading.Lock() # cProfile allows one active profiler per process
+        self.latency = Histogram('http_request_duration_seconds', 'Time spent handling requests.',
+                                 ('endpoint', 'method'), LATENCY_BUCKETS)
+        self.requests = Counter('http_requests_total', 'Requests handled.', ('endpoint', 'method', 'status'))
+        self.statements = Histogram('db_statements_per_request', 'SQL statements executed per request.',
+                                    ('endpoint',), STATEMENT_BUCKETS)
+        self.statement_seconds = Counter('db_statement_seconds_total', 'Time spent in SQL statements.',
+                                         ('endpoint',))
+        self.render_time = Histogram('template_render_seconds', 'Time spent rendering templates.',
+                                     ('template',), LATENCY_BUCKETS)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.profile_header = app.config['PROFILE_HEADER']
+        self.profile_token = app.config['PROFILE_TOKEN']
+        self.profile_dir = app.config['PROFILE_DIR'] or os.path.join(app.instance_path, 'profiles')
+        self.metrics_token = app.config['METRICS_TOKEN']
+        if not app.config['METRICS_ENABLED']:
+            return
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    # SQL: count and time every statement run while a request is active
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        if has_request_context() and 'metrics_sql' in g:
+            g.metrics_sql[0] += 1
+            g.metrics_sql[1] += elapsed
+
+    # Templates: before/after signals, a stack for templates rendered inside templates
+    def _before_render(self, app, template, context):
+        if has_request_context():
+            g.setdefault('metrics_templates', []).append(time.perf_counter())
+
+    def _after_render(self, app, template, context):
+        if has_request_context() and g.get('metrics_templates'):
+            elapsed = time.perf_counter() - g.metrics_templates.pop()
+            with self._lock:
+                self.render_time.observe((template.name or 'string',), elapsed)
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql = [0, 0.0]
+        if (self.profile_token and request.headers.get(self.profile_header) == self.profile_token
+                and self._profiling.acquire(blocking=False)):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    def _after_request(self, response):
+        if 'metrics_start' not in g:
+            return response
+        elapsed = time.perf_counter() - g.metrics_start
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            self._profiling.release()
+            response.headers['X-Profile-File'] = self._save_profile(profiler)
+        endpoint = request.endpoint or 'unmatched'
+        statements, statement_time = g.metrics_sql
+        with self._lock:
+            self.latency.observe((endpoint, request.method), elapsed)
+            self.requests.inc((endpoint, request.method, str(response.status_code)))
+            self.statements.observe((endpoint,), statements)
+            self.statement_seconds.inc((endpoint,), statement_time)
+        response.headers['Server-Timing'] = (f'app;dur={elapsed * 1000:.1f}, '
+                                             f'db;dur={statement_time * 1000:.1f};desc="{statements} statements"')
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request didn't run (e.g. the client went away); don't leave cProfile on
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            self._profiling.release()
+
+    def _save_profile(self, profiler):
+        # Open with `python -m pstats <file>` or snakeviz
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.endpoint or 'unmatched'}.prof"
+        profiler.dump_stats(os.path.join(self.profile_dir, name))
+        return name
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.latency, self.requests, self.statements, self.statement_seconds, self.render_time):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        if self.metrics_token and request.headers.get('Authorization') != f'Bearer {self.metrics_token}':
+            abort(403)
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
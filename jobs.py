@@ -0,0 +1,200 @@
+# jobs.py
+import atexit
+import logging
+import threading
+import time
+import weakref
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+
+log = logging.getLogger(__name__)
+
+# Background side effects (notifications, audit rows, maintenance follow-ups).
+# Routes call enqueue() inside their transaction; the job reaches the backend
+# only after that transaction commits, so a rolled-back request never triggers
+# it. Each job runs in its own app context (and so its own db.session) and is
+# retried with exponential backoff when it raises.
+
+HANDLERS = {}
+
+
+def job(fn):
+    # Register a function as a job handler under its own name
+    HANDLERS[fn.__name__] = fn
+    return fn
+
+
+class ThreadBackend:
+    # Local thread pool. Retries wait on a timer rather than in a worker, so a
+    # backing-off job doesn't hold a thread another job could use.
+    def __init__(self, workers):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jobs')
+        self._idle = threading.Condition()
+        self._pending = 0
+
+    def submit(self, fn, delay=0):
+        with self._idle:
+            self._pending += 1
+        if delay:
+            timer = threading.Timer(delay, self._start, (fn,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._start(fn)
+
+    def _start(self, fn):
+        try:
+            self._executor.submit(self._done_after, fn)
+        except RuntimeError: # Pool already shut down (retry timer fired after drain)
+            self._done_after(fn)
+
+    def _done_after(self, fn):
+        try:
+            fn()
+        finally:
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+    def pending(self):
+        return self._pending
+
+    def drain(self, timeout=None):
+        # Wait for queued jobs and scheduled retries; True if all of them ran
+        with self._idle:
+            drained = self._idle.wait_for(lambda: self._pending == 0, timeout)
+        self._executor.shutdown(wait=drained)
+        return drained
+
+
+class InlineBackend:
+    # Runs each job right away in the committing thread (scripts, debugging)
+    def __init__(self, workers=None):
+        pass
+
+    def submit(self, fn, delay=0):
+        if delay:
+            time.sleep(delay)
+        fn()
+
+    def pending(self):
+        return 0
+
+    def drain(self, timeout=None):
+        return True
+
+
+BACKENDS = {'thread': ThreadBackend, 'inline': InlineBackend}
+
+
+class JobRunner:
+    # Runs one app's jobs: its backend, retry settings, outcome counts and
+    # shutdown state. handlers: name -> function.
+    def __init__(self, app, backend, handlers):
+        self.app = app
+        self.backend = backend
+        self.handlers = handlers
+        self.max_attempts = app.config['JOB_MAX_ATTEMPTS']
+        self.retry_delay = app.config['JOB_RETRY_DELAY']
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def enqueue(self, name, *args, session=None, **kwargs):
+        # Runs handlers[name](*args, **kwargs) once `session` (default db.session) commits
+        if name not in self.handlers:
+            raise KeyError(f'Unknown job {name!r}')
+        (session or db.session).info.setdefault('pending_jobs', []).append((self, name, args, kwargs))
+
+    def submit(self, name, args, kwargs, attempt=1, delay=0):
+        run = lambda: self._run(name, args, kwargs, attempt)
+        if self._closed:
+            run() # Shutting down: finish the work here rather than drop it
+        else:
+            self.backend.submit(run, delay)
+
+    def _run(self, name, args, kwargs, attempt):
+        with self.app.app_context():
+            try:
+                self.handlers[name](*args, **kwargs)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                if attempt >= self.max_attempts:
+                    self._count('failed')
+                    log.exception('Job %s failed after %d attempts', name, attempt)
+                    return
+                self._count('retried')
+                delay = self.retry_delay * 2 ** (attempt - 1)
+                log.warning('Job %s failed (attempt %d), retrying in %.1fs', name, attempt, delay)
+                self.submit(name, args, kwargs, attempt + 1, delay)
+                return
+        self._count('succeeded')
+
+    def _count(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def stats(self):
+        return {'pending': self.backend.pending(), **self.counts}
+
+    def drain(self, timeout=None):
+        # Shutdown hook: stop taking new background work, let queued jobs finish
+        if self._closed:
+            return True
+        self._closed = True
+        drained = self.backend.drain(timeout)
+        if not drained:
+            log.warning('Background jobs still pending after %ss: %d', timeout, self.backend.pending())
+        return drained
+
+
+_runners = weakref.WeakSet() # Every app's runner, drained once at interpreter exit
+
+
+@atexit.register
+def _drain_runners():
+    for runner in list(_runners):
+        runner.drain(runner.app.config['JOB_DRAIN_TIMEOUT'])
+
+
+class JobQueue:
+    # One instance serves any number of apps; each app keeps its own JobRunner
+    # in app.extensions['jobs']. handlers: HANDLERS (the @job registry) by default
+    def __init__(self, app=None, backend=None, handlers=None):
+        self.backend = backend
+        self.handlers = HANDLERS if handlers is None else handlers
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = self.backend or BACKENDS[app.config['JOB_BACKEND']](app.config['JOB_WORKERS'])
+        runner = app.extensions['jobs'] = JobRunner(app, backend, self.handlers)
+        _runners.add(runner)
+
+    def enqueue(self, name, *args, session=None, **kwargs):
+        current_app.extensions['jobs'].enqueue(name, *args, session=session, **kwargs)
+
+    def stats(self):
+        return current_app.extensions['jobs'].stats()
+
+    def drain(self, timeout=None):
+        return current_app.extensions['jobs'].drain(timeout)
+
+
+jobs = JobQueue()
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    for queue, name, args, kwargs in session.info.pop('pending_jobs', ()):
+        queue.submit(name, args, kwargs)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('pending_jobs', None)
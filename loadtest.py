@@ -0,0 +1,253 @@
+# loadtest.py
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, func, inspect, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from models import db, User, Tool, ToolIssue, apply_sqlite_pragmas
+from jobs import JobRunner, ThreadBackend, InlineBackend
+from reservations import acquire_tool, flag_maintenance, release_tool
+
+
+def _settings(engine):
+    # The pool and (on SQLite) pragma values a run actually used, read back from the engine
+    pool = engine.pool
+    settings = {'pool': type(pool).__name__}
+    if hasattr(pool, 'size'):
+        settings.update(pool_size=pool.size(), max_overflow=pool._max_overflow, pool_timeout=pool._timeout)
+    settings['pre_ping'] = pool._pre_ping
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as conn:
+            for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                settings[name] = conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+    return settings
+
+
+def write_throughput(url, engine_options=None, pragmas=None, threads=8, writes=400):
+    # Concurrent single-row write transactions against a scratch table, the way
+    # several gunicorn workers committing at once hit the database. It drops
+    # and recreates its table, so it refuses a database holding the app's tables.
+    engine = create_engine(url, **(engine_options or {}))
+    apply_sqlite_pragmas(engine, pragmas)
+    if set(inspect(engine).get_table_names()) & set(db.metadata.tables):
+        engine.dispose()
+        raise ValueError(f'{engine.url!r} holds the application tables; use a scratch database')
+    with engine.begin() as conn:
+        conn.execute(text('DROP TABLE IF EXISTS bench_write'))
+        conn.execute(text('CREATE TABLE bench_write (id INTEGER PRIMARY KEY, writer INTEGER, payload VARCHAR(100))'))
+    committed, failed = [0], [0]
+    counter_lock = threading.Lock()
+    per_thread = max(1, writes // threads)
+
+    def writer(number):
+        for _ in range(per_thread):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text('INSERT INTO bench_write (writer, payload) VALUES (:w, :p)'),
+                                 {'w': number, 'p': 'x' * 64})
+                result = committed
+            except OperationalError: # "database is locked" and friends
+                result = failed
+            with counter_lock:
+                result[0] += 1
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    with engine.begin() as conn:
+        conn.execute(text('DROP TABLE bench_write'))
+    settings = _settings(engine)
+    engine.dispose()
+    return {
+        'settings': settings,
+        'committed': committed[0],
+        'failed': failed[0],
+        'seconds': round(elapsed, 3),
+        'writes_per_second': round(committed[0] / elapsed, 1),
+    }
+
+
+@contextmanager
+def _scratch_sqlite():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        yield 'sqlite:///' + path
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def compare_settings(engine_options, pragmas, threads=8, writes=400, url=None):
+    # Same workload with stock settings ('before') and the configured ones
+    # ('after'): on two scratch SQLite files, or on the scratch database at `url`
+    results = {}
+    for label, options, run_pragmas in (('before', {}, None),
+                                        ('after', engine_options, pragmas)):
+        if url is None:
+            with _scratch_sqlite() as scratch:
+                results[label] = write_throughput(scratch, options, run_pragmas, threads, writes)
+        else:
+            results[label] = write_throughput(url, options, run_pragmas, threads, writes)
+    return results
+
+
+def checkout_stress(engine_options, pragmas, threads=16, tools=10, attempts=2000, hold=0.002, exclusive=True):
+    # Many threads race to check out a few tools exclusively, keep them for
+    # `hold` seconds and give them back. A checkout counts as held from its
+    # committed acquire until its release has run (the release's write lock
+    # keeps anyone else out until it commits), so overlapping holders are seen
+    # together and `double_checkouts` must stay 0 (exclusive=False shares the
+    # tools and shows the check firing). Every tool must end up Available with
+    # no open uses.
+    with _scratch_sqlite() as url:
+        engine = create_engine(url, **engine_options)
+        apply_sqlite_pragmas(engine, pragmas)
+        db.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add_all([Tool(name=f'stress-{n}') for n in range(tools)])
+            session.commit()
+            tool_ids = list(session.scalars(select(Tool.id)))
+
+        holders = {tool_id: 0 for tool_id in tool_ids}
+        stats = {'acquired': 0, 'busy': 0, 'double_checkouts': 0}
+        lock = threading.Lock()
+        per_thread = max(1, attempts // threads)
+
+        def worker():
+            rng = random.Random()
+            with Session(engine) as session:
+                for _ in range(per_thread):
+                    tool_id = rng.choice(tool_ids)
+                    acquired = acquire_tool(tool_id, exclusive=exclusive, session=session)
+                    session.commit()
+                    with lock:
+                        if not acquired:
+                            stats['busy'] += 1
+                            continue
+                        stats['acquired'] += 1
+                        holders[tool_id] += 1
+                        stats['double_checkouts'] += holders[tool_id] > 1
+                    time.sleep(hold)
+                    release_tool(tool_id, session=session)
+                    with lock:
+                        holders[tool_id] -= 1
+                    session.commit()
+
+        start = time.perf_counter()
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        with Session(engine) as session:
+            leaked = session.scalar(select(func.count(Tool.id))
+                                    .where((Tool.in_use_count != 0) | (Tool.status != 'Available')))
+        engine.dispose()
+    stats.update(leaked_tools=leaked, seconds=round(elapsed, 3),
+                 checkouts_per_second=round(stats['acquired'] / elapsed, 1))
+    return stats
+
+
+def simulated_side_effect(seconds):
+    time.sleep(seconds) # Stands in for a slow notification / external call
+
+
+# The benchmark's queues run only this, so it never joins the app's job registry
+BENCH_HANDLERS = {'simulated_side_effect': simulated_side_effect}
+
+
+def side_effect_latency(app, costs=(0, 0.05, 0.2), requests=40, workers=4):
+    # The report_issue write path (insert issue, flag the tool, enqueue the side
+    # effect, commit) timed per request, with increasingly slow side effects run
+    # inline vs on the background pool. With the pool, the request's latency
+    # should not follow the side-effect cost.
+    results = {}
+    with _scratch_sqlite() as url:
+        engine = create_engine(url)
+        db.metadata.create_all(engine)
+        with Session(engine) as session:
+            reporter = User(username='bench', email='bench@example.com', password_hash='-', role='worker')
+            tool = Tool(name='bench-tool')
+            session.add_all([reporter, tool])
+            session.commit()
+            reporter_id, tool_id = reporter.id, tool.id
+
+        for label, make_backend in (('inline', InlineBackend), ('background', lambda: ThreadBackend(workers))):
+            for cost in costs:
+                queue = JobRunner(app, make_backend(), BENCH_HANDLERS)
+                queue.max_attempts, queue.retry_delay = 1, 0
+                timings = []
+                with Session(engine) as session:
+                    for n in range(requests):
+                        start = time.perf_counter()
+                        session.add(ToolIssue(title=f'bench {n}', description='-', reporter_id=reporter_id, tool_id=tool_id))
+                        flag_maintenance(tool_id, session=session)
+                        queue.enqueue('simulated_side_effect', cost, session=session)
+                        session.commit()
+                        timings.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                queue.backend.drain()
+                results.setdefault(label, {})[f'{int(cost * 1000)}ms'] = {
+                    'p50_ms': round(statistics.median(timings), 2),
+                    'max_ms': round(max(timings), 2),
+                    'drain_seconds': round(time.perf_counter() - start, 3),
+                }
+        engine.dispose()
+    return results
+
+
+def login_flood(app, username, clients=16, requests=20):
+    # `clients` threads each POST `requests` wrong-password logins for an
+    # existing user (so every admitted request pays for a hash), three ways:
+    # no limits, all from one IP (the token bucket answers), and each from its
+    # own IP (only the concurrency limit answers). With limits on, the turned
+    # away requests should come back in milliseconds instead of queueing.
+    saved = {key: app.config.get(key, True) for key in ('WTF_CSRF_ENABLED', 'RATELIMIT_ENABLED')}
+    results = {}
+    addresses = iter(f'10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}' for n in range(random.randrange(1 << 20), 1 << 24))
+    flood_ip = f'192.0.2.{random.randrange(1, 255)}'
+    lock = threading.Lock()
+    try:
+        for label, enabled, one_ip in (('unlimited', False, True), ('one_ip', True, True), ('many_ips', True, False)):
+            app.config.update(WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=enabled)
+            timings = {}
+
+            def client():
+                http = app.test_client()
+                for _ in range(requests):
+                    with lock:
+                        ip = flood_ip if one_ip else next(addresses)
+                    start = time.perf_counter()
+                    response = http.post('/login', data={'username': username, 'password': 'wrong-password'},
+                                         environ_base={'REMOTE_ADDR': ip})
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        timings.setdefault(response.status_code, []).append(elapsed)
+
+            threads = [threading.Thread(target=client) for _ in range(clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results[label] = {'seconds': round(time.perf_counter() - start, 3)}
+            for status, values in sorted(timings.items()):
+                values.sort()
+                results[label][str(status)] = {'count': len(values), 'p50_ms': round(statistics.median(values), 2),
+                                               'max_ms': round(values[-1], 2)}
+    finally:
+        app.config.update(saved)
+    return results
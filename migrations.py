@@ -0,0 +1,123 @@
+# migrations.py
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.schema import CreateColumn, CreateTable
+from models import db, Tool, Task, ToolIssue, JobRequest, DataVersion, ARCHIVE_TABLES
+from page_cache import DATA_KINDS
+from reservations import recount_tool_usage
+from search import create_index, rebuild_index
+from analytics import rebuild_rollups
+from pagination import keyset_query
+from stats import LISTED_TOOLS, pending_job_requests, status_query
+
+
+def upgrade_db():
+    # Idempotent upgrade for an existing database: create any missing tables,
+    # add model columns the tables don't have yet (they all carry a server
+    # default), then create any missing indexes. Returns what was applied.
+    new_tables = set(db.metadata.tables) - set(inspect(db.engine).get_table_names())
+    db.create_all()
+    applied = _sqlite_autoincrement()
+    inspector = inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}'))
+                    applied.append(f'{table.name}.{column.name}')
+    for table in db.metadata.sorted_tables:
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                applied.append(index.name)
+    # Seed the page-cache version counters
+    seeded = {name for (name,) in db.session.query(DataVersion.name)}
+    for kind in set(DATA_KINDS) - seeded:
+        db.session.add(DataVersion(name=kind, version=0))
+        applied.append(f'data_version.{kind}')
+    db.session.commit()
+    if 'tool.in_use_count' in applied:
+        # Seed the reservation counters from the tasks that are still open
+        recount_tool_usage()
+        db.session.commit()
+    if create_index():
+        # Full-text index (SQLite FTS5), filled once from the existing rows
+        rebuild_index()
+        applied.append('search_index')
+    if 'tool_usage_total' in new_tables:
+        # Analytics rollups, computed once from the existing history
+        rebuild_rollups()
+        applied.append('tool_usage rollups')
+    return applied
+
+
+def _sqlite_autoincrement():
+    # Hot tables created before they used AUTOINCREMENT are rebuilt with it
+    # (SQLite can't change a primary key in place): copy into a new table, drop
+    # the old one and rename; upgrade_db then recreates the indexes. Their
+    # sequences are moved past every archived id, so no id is handed out twice.
+    applied = []
+    if db.engine.dialect.name != 'sqlite':
+        return applied
+    preparer = db.engine.dialect.identifier_preparer
+    with db.engine.begin() as conn:
+        for model, archive in ARCHIVE_TABLES.items():
+            table = model.__table__
+            ddl = conn.scalar(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                              {'name': table.name})
+            if 'AUTOINCREMENT' not in ddl.upper():
+                name, staging = preparer.format_table(table), preparer.quote(f'{table.name}__new')
+                create = str(CreateTable(table).compile(db.engine))
+                create = create.replace(f'CREATE TABLE {name} ', f'CREATE TABLE {staging} ', 1)
+                columns = ', '.join(preparer.quote(column.name) for column in table.columns)
+                conn.execute(text(create))
+                conn.execute(text(f'INSERT INTO {staging} ({columns}) SELECT {columns} FROM {name}'))
+                conn.execute(text(f'DROP TABLE {name}'))
+                conn.execute(text(f'ALTER TABLE {staging} RENAME TO {name}'))
+                applied.append(f'{table.name} autoincrement')
+            top = max(conn.scalar(select(func.max(table.c.id))) or 0, conn.scalar(select(func.max(archive.c.id))) or 0)
+            if not conn.execute(text('UPDATE sqlite_sequence SET seq = max(seq, :top) WHERE name = :name'),
+                                {'top': top, 'name': table.name}).rowcount:
+                conn.execute(text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :top)'),
+                             {'top': top, 'name': table.name})
+    return applied
+
+
+def hot_queries():
+    # The filter/sort patterns the dashboards and worker pages run on every hit
+    return {
+        'worker tasks': Task.query.filter_by(worker_id=1).order_by(Task.assigned_date.desc()),
+        'worker task counts': status_query(Task, Task.worker_id == 1),
+        'task counts': status_query(Task),
+        'tool counts': status_query(Tool, *LISTED_TOOLS),
+        'available tools': Tool.query.filter_by(status='Available'),
+        'pending job requests': keyset_query(pending_job_requests(), JobRequest.id, per_page=50),
+        'worker job requests': JobRequest.query.filter_by(worker_id=1)
+                                               .order_by(JobRequest.requested_date.desc()),
+        'tool issues': ToolIssue.query.filter_by(tool_id=1),
+        'tasks page': Task.query.filter(Task.id < 1000).order_by(Task.id.desc()).limit(50),
+    }
+
+
+def _is_full_scan(dialect, line):
+    if dialect == 'sqlite':
+        return line.startswith('SCAN') and 'INDEX' not in line
+    return 'Seq Scan' in line # PostgreSQL
+
+
+def explain_hot_queries():
+    # Returns {name: (plan_lines, full_scan)}; full_scan is True when the
+    # database reads a table row by row instead of seeking through an index.
+    dialect = db.engine.dialect.name
+    explain = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    results = {}
+    with db.engine.connect() as conn:
+        for name, query in hot_queries().items():
+            sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+            plan = [row[-1] for row in conn.execute(text(explain + sql))]
+            full_scan = any(_is_full_scan(dialect, line) for line in plan)
+            results[name] = (plan, full_scan)
+    return results
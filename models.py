@@ -1,16 +1,29 @@
 # models.py
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hash_password, verify_password, needs_rehash
 
 db = SQLAlchemy()
 
+def apply_sqlite_pragmas(engine, pragmas):
+    # Must run before the engine opens its first connection
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(20), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False) # scrypt hashes are ~160 chars
     role = db.Column(db.String(10), nullable=False, default='worker') # 'owner' or 'worker'
     tasks = db.relationship('Task', backref='assignee', lazy=True)
     reported_issues = db.relationship('ToolIssue', backref='reporter', lazy=True)
@@ -18,10 +31,13 @@ class User(UserMixin, db.Model):
 
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f"User('{self.username}', '{self.email}', '{self.role}')"
@@ -30,13 +46,20 @@ class Tool(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    status = db.Column(db.String(20), nullable=False, default='Available') # Available, In-Use, Maintenance
+    status = db.Column(db.String(20), nullable=False, default='Available') # Available, In-Use, Maintenance, Retired
     last_maintenance = db.Column(db.DateTime, nullable=True)
+    in_use_count = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Open tasks using this tool
+    # Tools are never deleted: retiring one is a soft delete (status 'Retired')
+    # and archive.py moves its history out in batches with explicit deletes
     tasks = db.relationship('Task', backref='tool', lazy=True)
     issues = db.relationship('ToolIssue', backref='tool_affected', lazy=True)
     # MODIFIED: Changed backref from 'requested_tool' to 'tool'
     job_requests = db.relationship('JobRequest', backref='tool', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_tool_status', 'status'), # Available-tools lists and status counts
+    )
+
     def __repr__(self):
         return f"Tool('{self.name}', '{self.status}')"
 
@@ -51,6 +74,15 @@ class Task(db.Model):
     worker_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     tool_id = db.Column(db.Integer, db.ForeignKey('tool.id'), nullable=True) # Task might not require a specific tool
 
+    __table_args__ = (
+        db.Index('ix_task_worker_assigned', 'worker_id', 'assigned_date'), # Worker's tasks, newest first
+        db.Index('ix_task_status', 'status'), # Status counts
+        db.Index('ix_task_tool_id', 'tool_id'), # Tasks using a tool (delete/report lookups)
+        db.Index('ix_task_status_worker_priority', 'status', 'worker_id', 'priority'), # Open load per worker (scheduler)
+        # Never hand out an id again once its row is archived (see _archive_table)
+        {'sqlite_autoincrement': True},
+    )
+
     def __repr__(self):
         return f"Task('{self.title}', '{self.status}', 'Assigned to: {self.assignee.username if self.assignee else 'N/A'}')"
 
@@ -63,6 +95,11 @@ class ToolIssue(db.Model):
     reporter_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     tool_id = db.Column(db.Integer, db.ForeignKey('tool.id'), nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_tool_issue_tool_id', 'tool_id'),
+        {'sqlite_autoincrement': True},
+    )
+
     def __repr__(self):
         return f"ToolIssue('{self.title}', 'Tool: {self.tool_affected.name if self.tool_affected else 'N/A'}', 'Status: {self.status}')"
 
@@ -77,6 +114,128 @@ class JobRequest(db.Model):
     worker_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False) # Consider renaming to requester_id for clarity
     tool_id = db.Column(db.Integer, db.ForeignKey('tool.id'), nullable=True) # Optional: request can be about a tool
 
+    __table_args__ = (
+        db.Index('ix_job_request_status_requested', 'status', 'requested_date'), # Pending requests, oldest first (scheduler)
+        db.Index('ix_job_request_status_id', 'status', 'id'), # Owner dashboard's pending requests, keyset on id
+        db.Index('ix_job_request_worker_requested', 'worker_id', 'requested_date'), # Worker's own requests
+        db.Index('ix_job_request_tool_id', 'tool_id'),
+        {'sqlite_autoincrement': True},
+    )
+
     def __repr__(self):
         # Accessing `self.requester` is correct due to `User.job_requests` backref
-        return f"JobRequest('{self.title}', 'Requested by: {self.requester.username}', 'Status: {self.status}')"
\ No newline at end of file
+        return f"JobRequest('{self.title}', 'Requested by: {self.requester.username}', 'Status: {self.status}')"
+
+def _archive_table(model, *indexes):
+    # Cold copy of a table: same columns, no foreign keys (the user or tool a row
+    # points to may be gone), plus when the row was moved. Rows keep their id,
+    # which is why the hot tables use AUTOINCREMENT: without it SQLite reuses
+    # the highest id once that row has moved here.
+    columns = [db.Column(column.name, column.type, primary_key=column.primary_key,
+                         autoincrement=False, nullable=column.nullable)
+               for column in model.__table__.columns]
+    name = f'{model.__tablename__}_archive'
+    return db.Table(name, *columns,
+                    db.Column('archived_at', db.DateTime, nullable=False, server_default=db.func.current_timestamp()),
+                    db.Index(f'ix_{name}_tool_id', 'tool_id'),
+                    *(db.Index(f'ix_{name}_{"_".join(cols)}', *cols) for cols in indexes))
+
+# History pages read these newest first, per worker or for everyone
+task_archive = _archive_table(Task, ('worker_id', 'id'))
+tool_issue_archive = _archive_table(ToolIssue, ('reporter_id', 'id'))
+job_request_archive = _archive_table(JobRequest, ('worker_id', 'id'))
+ARCHIVE_TABLES = {Task: task_archive, ToolIssue: tool_issue_archive, JobRequest: job_request_archive}
+
+class DataVersion(db.Model):
+    # One counter per model kind, bumped in the same transaction as any change
+    # to it; cached pages are keyed on these so every process sees the change
+    name = db.Column(db.String(20), primary_key=True) # tool, task, issue, job_request
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"DataVersion('{self.name}', {self.version})"
+
+class AuditLog(db.Model):
+    # Who did what to which row; written by background jobs, never by requests
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    actor_id = db.Column(db.Integer, nullable=True) # No FK: the trail outlives deleted users
+    action = db.Column(db.String(40), nullable=False) # e.g. issue.reported, tool.deleted
+    target_type = db.Column(db.String(20), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    detail = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_audit_log_target', 'target_type', 'target_id'),
+    )
+
+    def __repr__(self):
+        return f"AuditLog('{self.action}', '{self.target_type}:{self.target_id}')"
+
+class Notification(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    message = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    read = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+
+    __table_args__ = (
+        db.Index('ix_notification_user_read', 'user_id', 'read'), # A user's unread notifications
+    )
+
+    def __repr__(self):
+        return f"Notification('{self.user_id}', '{self.message}')"
+
+class ToolUsageDaily(db.Model):
+    # Daily rollup per tool, kept up to date by analytics.py as tasks complete
+    # and issues are reported; the analytics page never reads the raw history
+    tool_id = db.Column(db.Integer, db.ForeignKey('tool.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    busy_seconds = db.Column(db.Integer, nullable=False, default=0) # Task time (assigned -> completed) on this day
+    tasks_completed = db.Column(db.Integer, nullable=False, default=0)
+    issues_reported = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Window totals over all tools: covering, so a window reads only its own days
+        db.Index('ix_tool_usage_daily_day', 'day', 'tool_id', 'busy_seconds', 'tasks_completed', 'issues_reported'),
+    )
+
+    def __repr__(self):
+        return f"ToolUsageDaily('{self.tool_id}', '{self.day}', {self.busy_seconds})"
+
+class ToolUsageTotal(db.Model):
+    # All-time running totals per tool, updated alongside ToolUsageDaily
+    tool_id = db.Column(db.Integer, db.ForeignKey('tool.id'), primary_key=True)
+    busy_seconds = db.Column(db.Integer, nullable=False, default=0)
+    tasks_completed = db.Column(db.Integer, nullable=False, default=0)
+    issues_reported = db.Column(db.Integer, nullable=False, default=0)
+    first_issue_at = db.Column(db.DateTime, nullable=True) # Mean time between issues =
+    last_issue_at = db.Column(db.DateTime, nullable=True)  # (last - first) / (issues - 1)
+
+    def __repr__(self):
+        return f"ToolUsageTotal('{self.tool_id}', {self.busy_seconds}, {self.issues_reported})"
+
+class RateLimitBucket(db.Model):
+    # Token buckets of the 'database' rate-limit backend (ratelimit.py), shared
+    # by every worker; a row idle longer than its window is full and gets pruned
+    key = db.Column(db.String(200), primary_key=True) # "<endpoint>:<ip or user id>"
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False, index=True) # Unix time of the last take
+
+    def __repr__(self):
+        return f"RateLimitBucket('{self.key}', {self.tokens})"
+
+class LiveEvent(db.Model):
+    # Outbox of the live dashboard stream (events.py): each committed change's
+    # deltas, written in the same transaction, read back by every server process
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False) # tool, task, issue, job_request
+    data = db.Column(db.Text, nullable=False) # JSON delta
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        {'sqlite_autoincrement': True}, # Pollers remember the last id they read
+    )
+
+    def __repr__(self):
+        return f"LiveEvent('{self.kind}', {self.id})"
@@ -0,0 +1,190 @@
+# page_cache.py
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import object_session
+from assets import BUILD_DIR, MANIFEST
+from models import db, DataVersion, Tool, Task, ToolIssue, JobRequest
+
+log = logging.getLogger(__name__)
+
+# Rendered-page cache with ETag / conditional GET. A page's key is its path,
+# the viewer, the DataVersion counters of the data it shows, the release and
+# the current PAGE_CACHE_TTL window, so a commit to any of that data or a
+# deploy changes the key and old entries simply stop being hit. The window
+# also caps how old a page (and the CSRF token in it) can get, through 304s
+# as well as through cache hits.
+
+DATA_KINDS = ('tool', 'task', 'issue', 'job_request')
+TABLE_KINDS = {Tool.__tablename__: 'tool', Task.__tablename__: 'task', ToolIssue.__tablename__: 'issue',
+               JobRequest.__tablename__: 'job_request'}
+
+
+class PageCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # etag -> (stored_at, body, mimetype)
+        self._bytes = 0
+        self.metrics = {'hits': 0, 'misses': 0, 'not_modified': 0, 'evictions': 0}
+
+    def get(self, etag, ttl):
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry and time.monotonic() - entry[0] < ttl:
+                self._entries.move_to_end(etag)
+                self.metrics['hits'] += 1
+                return entry
+            self.metrics['misses'] += 1
+            return None
+
+    def put(self, etag, body, mimetype, max_entries, max_bytes):
+        with self._lock:
+            old = self._entries.pop(etag, None)
+            if old:
+                self._bytes -= len(old[1])
+            self._entries[etag] = (time.monotonic(), body, mimetype)
+            self._bytes += len(body)
+            while self._entries and (len(self._entries) > max_entries or self._bytes > max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[1])
+                self.metrics['evictions'] += 1
+
+    def count(self, metric):
+        with self._lock:
+            self.metrics[metric] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.metrics, entries=len(self._entries), bytes=self._bytes)
+
+
+page_cache = PageCache()
+
+
+def data_versions(kinds):
+    if not kinds:
+        return ()
+    rows = dict(db.session.query(DataVersion.name, DataVersion.version).filter(DataVersion.name.in_(kinds)))
+    return tuple(rows.get(kind, 0) for kind in kinds)
+
+
+def bump_versions(connection, kinds):
+    # connection: a Connection or Session
+    kinds = sorted(kinds)
+    bumped = connection.execute(update(DataVersion.__table__).where(DataVersion.name.in_(kinds))
+                                .values(version=DataVersion.version + 1)
+                                .returning(DataVersion.name)).scalars().all()
+    missing = set(kinds) - set(bumped) # Counter rows not seeded yet (see upgrade_db)
+    if missing:
+        connection.execute(insert(DataVersion.__table__), [{'name': kind, 'version': 1} for kind in sorted(missing)])
+
+
+def _viewer_key():
+    # The navbar shows the user, and pages embed the session's CSRF token
+    if not current_user.is_authenticated:
+        return 'anonymous'
+    return f"{current_user.id}:{session.get('csrf_token', '')}"
+
+
+def _release_key():
+    # RELEASE_ID plus a hash of the templates and the asset manifest, computed
+    # once per process: a process serves the templates and manifest it loaded
+    app = current_app._get_current_object()
+    key = app.extensions.get('page_cache_release')
+    if key is None:
+        digest = hashlib.sha1(app.config['RELEASE_ID'].encode())
+        paths = [os.path.join(app.static_folder, BUILD_DIR, MANIFEST)]
+        for folder, dirs, files in sorted(os.walk(os.path.join(app.root_path, app.template_folder))):
+            paths.extend(os.path.join(folder, name) for name in sorted(files))
+        for path in paths:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        key = app.extensions['page_cache_release'] = digest.hexdigest()
+    return key
+
+
+def cached_page(*kinds):
+    # Decorator for GET views whose output depends only on the viewer, the URL
+    # and the listed data kinds. Goes inside the auth decorators.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            # Pages carrying flash messages are one-off, never cache them
+            if not config['PAGE_CACHE_ENABLED'] or request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+            window = int(time.time() // config['PAGE_CACHE_TTL'])
+            key = repr((request.full_path, _viewer_key(), kinds, data_versions(kinds), _release_key(), window))
+            etag = hashlib.sha1(key.encode()).hexdigest()
+            if etag in request.if_none_match:
+                page_cache.count('not_modified')
+                response = make_response('', 304)
+            else:
+                entry = page_cache.get(etag, config['PAGE_CACHE_TTL'])
+                if entry:
+                    response = make_response(entry[1])
+                    response.mimetype = entry[2]
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed or session.get('_flashes'):
+                        return response
+                    page_cache.put(etag, response.get_data(), response.mimetype,
+                                   config['PAGE_CACHE_MAX_ENTRIES'], config['PAGE_CACHE_MAX_BYTES'])
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache' # Always revalidate, cheap via 304
+            return response
+        return wrapper
+    return decorator
+
+
+# Invalidation: note every kind a transaction writes, through ORM flushes
+# (mapper events) and Core/bulk statements run on the session
+# (do_orm_execute), then bump those counters once it has committed, in a short
+# transaction of their own. Bumping inside the writer's transaction would hold
+# the counter row's lock until that commit and serialize unrelated writers.
+# A page rendered between the commit and the bump is stored under the old
+# counters, which nobody asks for once the bump lands.
+def _note_kind(session, table):
+    kind = TABLE_KINDS.get(table.name)
+    if session is not None and kind:
+        session.info.setdefault('written_kinds', set()).add(kind)
+
+def _row_written(mapper, connection, target):
+    _note_kind(object_session(target), mapper.local_table)
+
+for _model in (Tool, Task, ToolIssue, JobRequest):
+    event.listen(_model, 'after_insert', _row_written)
+    event.listen(_model, 'after_update', _row_written)
+    event.listen(_model, 'after_delete', _row_written)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _statement_executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _note_kind(orm_execute_state.session, orm_execute_state.statement.table)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _after_commit(session):
+    kinds = session.info.pop('written_kinds', None)
+    if not kinds:
+        return
+    try:
+        with session.get_bind().begin() as connection:
+            bump_versions(connection, kinds)
+    except Exception:
+        # The write itself is committed; cached pages just live out PAGE_CACHE_TTL
+        log.exception('Bumping page cache versions failed')
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('written_kinds', None)
@@ -0,0 +1,27 @@
+# pagination.py
+from flask import current_app
+
+
+def page_size():
+    return current_app.config.get('DASHBOARD_PAGE_SIZE', 50)
+
+
+def keyset_query(query, key_column, after=None, per_page=None, descending=True):
+    # The query keyset_page runs (also what migrations.explain_hot_queries checks)
+    per_page = per_page or page_size()
+    if after is not None:
+        query = query.filter(key_column < after if descending else key_column > after)
+    query = query.order_by(key_column.desc() if descending else key_column.asc())
+    # Fetch one extra row to know whether there is a next page without a COUNT(*)
+    return query.limit(per_page + 1)
+
+
+def keyset_page(query, key_column, after=None, per_page=None, descending=True):
+    # Keyset ("seek") pagination: instead of OFFSET, filter on the last key seen.
+    # Cost stays the same on page 1 and page 1000, and rows inserted while the
+    # user is paging do not shift the window.
+    per_page = per_page or page_size()
+    rows = keyset_query(query, key_column, after, per_page, descending).all()
+    items = rows[:per_page]
+    next_after = getattr(items[-1], key_column.key) if len(rows) > per_page else None
+    return items, next_after
@@ -0,0 +1,102 @@
+# passwords.py
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Password KDF work runs on a small dedicated pool. werkzeug's scrypt/pbkdf2
+# release the GIL, so this caps how many cores a login burst can take, and a
+# bounded slot count turns overload into a fast "busy" answer instead of an
+# ever-growing queue of request threads. Each app gets its own pool, sized
+# from its config on first use and kept in app.extensions['passwords'].
+_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def _pool():
+    extensions = current_app.extensions
+    if 'passwords' not in extensions:
+        with _lock:
+            if 'passwords' not in extensions:
+                workers = current_app.config['PASSWORD_HASH_WORKERS']
+                slots = threading.BoundedSemaphore(workers + current_app.config['PASSWORD_HASH_QUEUE'])
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+                extensions['passwords'] = (executor, slots)
+    return extensions['passwords']
+
+
+def _run(fn, *args):
+    executor, slots = _pool()
+    if not slots.acquire(timeout=current_app.config['PASSWORD_HASH_WAIT']):
+        raise HashingBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_method():
+    return current_app.config['PASSWORD_HASH_METHOD']
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(pwhash, password):
+    return _run(check_password_hash, pwhash, password)
+
+
+@lru_cache(maxsize=None)
+def _stored_method(method):
+    # werkzeug stores the expanded method ("scrypt" -> "scrypt:32768:8:1",
+    # "pbkdf2:sha256" -> "pbkdf2:sha256:<iterations>"), so ask it once per method
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def needs_rehash(pwhash):
+    # Hashes are stored as "<method>$<salt>$<hash>"; a different method prefix
+    # means the configured parameters changed since this hash was made.
+    return pwhash.split('$', 1)[0] != _stored_method(hash_method())
+
+
+def benchmark_verify(requests=200, threads=16):
+    # Verifies one password `requests` times from `threads` concurrent callers
+    # through the pool, the same path a burst of logins takes.
+    app = current_app._get_current_object()
+    pwhash = hash_password('benchmark-password')
+    latencies = []
+    latencies_lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        with app.app_context():
+            for _ in counter:
+                start = time.perf_counter()
+                verify_password(pwhash, 'benchmark-password')
+                with latencies_lock:
+                    latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    callers = [threading.Thread(target=client) for _ in range(threads)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'method': hash_method(),
+        'requests': len(latencies),
+        'threads': threads,
+        'pool_workers': current_app.config['PASSWORD_HASH_WORKERS'],
+        'logins_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
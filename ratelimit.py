@@ -0,0 +1,154 @@
+# ratelimit.py
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+from flask import Response, current_app, jsonify, request
+from flask_login import current_user
+from sqlalchemy import case, delete, select
+from models import db, RateLimitBucket
+
+# Rate limiting and backpressure for the write endpoints (login, register, job
+# requests, issue reports). Each limited view gets a token bucket per client,
+# keyed on the IP or the logged-in user: RATELIMIT_<NAME> = "<requests>/<seconds>"
+# allows a burst of <requests>, refilled evenly over <seconds>. An empty bucket
+# answers 429 with Retry-After before the view does any database or hashing work.
+#
+# On top of that, a process handles at most RATELIMIT_MAX_CONCURRENT limited
+# POSTs at once; the next one waits RATELIMIT_CONCURRENCY_WAIT seconds for a
+# slot and then gets a 503, so a flood is turned away quickly instead of
+# queueing until it times out. GETs (the forms themselves) are never limited.
+#
+# Buckets live in a backend: 'memory' (per process, so with N workers a client
+# gets up to N times its limit) or 'database' (one upsert per limited POST,
+# shared by every worker through the rate_limit_bucket table).
+#
+# The client IP is request.remote_addr: behind a reverse proxy, set
+# TRUSTED_PROXIES so it is the client's address rather than the proxy's.
+
+
+def parse_limit(value):
+    # "10/60" -> (burst of 10, refill rate in tokens per second)
+    count, seconds = value.split('/')
+    return int(count), int(count) / float(seconds)
+
+
+class MemoryBackend:
+    # Buckets in a dict behind one lock; past max_keys the least recently
+    # seen client is dropped, which only hands it a full bucket again
+    def __init__(self, app):
+        self.max_keys = app.config['RATELIMIT_MAX_KEYS']
+        self._buckets = OrderedDict() # key -> (tokens, monotonic time of the last take)
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, rate):
+        # Returns 0 if a token was taken, else seconds until one is available
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - stamp) * rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0 if allowed else (1 - tokens) / rate
+
+
+class DatabaseBackend:
+    # One atomic upsert per take, in its own short transaction (never the
+    # request's db.session): the refill and the take happen in the same
+    # statement, so concurrent workers can't both spend the last token
+    def __init__(self, app):
+        self.prune_after = max(burst / rate for burst, rate in
+                               (parse_limit(app.config[f'RATELIMIT_{name}']) for name in LIMITS))
+        self._pruned = 0
+
+    def take(self, key, burst, rate):
+        now = time.time()
+        table = RateLimitBucket.__table__
+        refilled = table.c.tokens + (now - table.c.updated_at) * rate
+        refilled = case((refilled > burst, float(burst)), else_=refilled)
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(key=key, tokens=burst - 1, updated_at=now)
+        stmt = stmt.on_conflict_do_update(index_elements=[table.c.key],
+                                          set_={'tokens': refilled - 1, 'updated_at': now},
+                                          where=refilled >= 1).returning(table.c.tokens)
+        with db.engine.begin() as conn:
+            if conn.execute(stmt).first() is not None:
+                self._prune(conn, now)
+                return 0
+            tokens, stamp = conn.execute(select(table.c.tokens, table.c.updated_at)
+                                         .where(table.c.key == key)).one()
+        return (1 - min(burst, tokens + (now - stamp) * rate)) / rate
+
+    def _prune(self, conn, now):
+        # A bucket idle for the longest window is full again: same as no row
+        if now - self._pruned > 60:
+            self._pruned = now
+            conn.execute(delete(RateLimitBucket).where(RateLimitBucket.updated_at < now - self.prune_after))
+
+
+BACKENDS = {'memory': MemoryBackend, 'database': DatabaseBackend}
+
+# Limited views: RATELIMIT_<name> config key -> what the client key is built from
+LIMITS = {'LOGIN': 'ip', 'REGISTER': 'ip', 'REQUEST_JOB': 'user', 'REPORT_ISSUE': 'user'}
+
+
+class RateLimiter:
+    # One instance serves any number of apps; each app keeps its own backend
+    # and concurrency slots in app.extensions['ratelimit']
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        self.counts = Counter() # rejections per reason ('limited', 'busy')
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['ratelimit'] = {
+            'backend': self.backend or BACKENDS[app.config['RATELIMIT_BACKEND']](app),
+            'slots': threading.BoundedSemaphore(app.config['RATELIMIT_MAX_CONCURRENT']),
+        }
+
+    def limit(self, name):
+        # Decorator for a view listed in LIMITS
+        by = LIMITS[name]
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'POST' or not current_app.config['RATELIMIT_ENABLED']:
+                    return view(*args, **kwargs)
+                state = current_app.extensions['ratelimit']
+                burst, rate = parse_limit(current_app.config[f'RATELIMIT_{name}'])
+                client = current_user.id if by == 'user' and current_user.is_authenticated else request.remote_addr
+                retry_after = state['backend'].take(f'{request.endpoint}:{client}', burst, rate)
+                if retry_after:
+                    return self._reject('limited', 429, 'Too many requests', retry_after)
+                if not state['slots'].acquire(timeout=current_app.config['RATELIMIT_CONCURRENCY_WAIT']):
+                    return self._reject('busy', 503, 'The server is busy', 1)
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    state['slots'].release()
+            return wrapper
+        return decorator
+
+    def _reject(self, reason, status, message, retry_after):
+        # Short plain responses, no template rendering or database work
+        with self._lock:
+            self.counts[reason] += 1
+        seconds = max(1, math.ceil(retry_after))
+        if request.is_json or request.accept_mimetypes.best == 'application/json':
+            response = jsonify(error=f'{message}, try again in {seconds} seconds.')
+            response.status_code = status
+        else:
+            response = Response(f'{message}, please try again in {seconds} seconds.\n', status, mimetype='text/plain')
+        response.headers['Retry-After'] = str(seconds)
+        return response
+
+
+limiter = RateLimiter()
@@ -0,0 +1,121 @@
+# reservations.py
+from datetime import datetime
+from sqlalchemy import case, func, select, update
+from models import db, Tool, Task
+from choices import mark_choices_dirty
+from events import queue_event
+from analytics import record_task
+
+# Tool checkout without read-modify-write races. Tool.in_use_count holds the
+# number of open (not Completed) tasks using the tool, and every status change
+# is a single conditional UPDATE, so concurrent requests can't overwrite each
+# other's decision. Reads never lock anything.
+
+TOOL_RETURNING = (Tool.id, Tool.status, Tool.in_use_count)
+TASK_RETURNING = (Task.id, Task.status, Task.worker_id, Task.tool_id, Task.assigned_date, Task.completed_date)
+
+
+def _update_tool(session, stmt):
+    row = session.execute(stmt.returning(*TOOL_RETURNING), execution_options={'synchronize_session': False}).first()
+    if row is None:
+        return False
+    queue_event('tool', dict(row._mapping), session)
+    return True
+
+
+def acquire_tool(tool_id, exclusive=False, count=1, session=None, in_service=False):
+    # Count `count` more open tasks on the tool. exclusive=True only succeeds if
+    # the tool is currently Available (owner checkout); otherwise the tasks share
+    # the tool and an Available tool becomes In-Use. Retired tools are never
+    # acquired, and in_service=True (new work) also refuses a tool in
+    # Maintenance. Returns True on success.
+    session = session or db.session
+    stmt = update(Tool).where(Tool.id == tool_id)
+    if exclusive:
+        stmt = stmt.where(Tool.status == 'Available').values(in_use_count=Tool.in_use_count + count,
+                                                             status='In-Use')
+    else:
+        usable = Tool.status.in_(('Available', 'In-Use')) if in_service else Tool.status != 'Retired'
+        stmt = stmt.where(usable).values(in_use_count=Tool.in_use_count + count,
+                                         status=case((Tool.status == 'Available', 'In-Use'), else_=Tool.status))
+    return _update_tool(session, stmt)
+
+
+def release_tool(tool_id, count=1, session=None):
+    # Drop `count` open tasks from the tool; the last one out makes an In-Use
+    # tool Available again (a tool in Maintenance stays there).
+    session = session or db.session
+    stmt = (update(Tool)
+            .where(Tool.id == tool_id, Tool.in_use_count >= count)
+            .values(in_use_count=Tool.in_use_count - count,
+                    status=case(((Tool.in_use_count == count) & (Tool.status == 'In-Use'), 'Available'),
+                                else_=Tool.status)))
+    return _update_tool(session, stmt)
+
+
+def flag_maintenance(tool_id, session=None):
+    session = session or db.session
+    stmt = (update(Tool).where(Tool.id == tool_id, Tool.status.notin_(('Maintenance', 'Retired')))
+            .values(status='Maintenance'))
+    return _update_tool(session, stmt)
+
+
+def retire_tool(tool_id, session=None):
+    # Soft delete: the tool leaves every list and can't be checked out again;
+    # its tasks, issues and requests are archived afterwards (archive.py)
+    session = session or db.session
+    stmt = update(Tool).where(Tool.id == tool_id, Tool.status != 'Retired').values(status='Retired', in_use_count=0)
+    if not _update_tool(session, stmt):
+        return False
+    mark_choices_dirty(session) # Leaves the tool select lists
+    return True
+
+
+def owner_status(status):
+    # Status an owner sets by hand: "Available" can't free a tool that open
+    # tasks still hold, so it resolves to In-Use inside the UPDATE itself.
+    if status == 'Available':
+        return case((Tool.in_use_count > 0, 'In-Use'), else_='Available')
+    return status
+
+
+def _move_task(session, task_id, condition, **values):
+    # Returns the updated row (TASK_RETURNING), or None if the condition didn't hold
+    stmt = update(Task).where(Task.id == task_id, condition).values(**values).returning(*TASK_RETURNING)
+    row = session.execute(stmt, execution_options={'synchronize_session': False}).first()
+    if row is not None:
+        queue_event('task', dict(row._mapping), session)
+    return row
+
+
+def set_task_status(task_id, status, session=None):
+    # Conditional task transition: only the request that actually moves the task
+    # into or out of "Completed" releases or re-acquires its tool (and books or
+    # takes back its tool time), so duplicate or concurrent submissions can't
+    # free a tool twice. Returns True if the task changed.
+    session = session or db.session
+    task = session.execute(select(Task.tool_id, Task.assigned_date, Task.completed_date)
+                           .where(Task.id == task_id)).first()
+    tool_id = task.tool_id if task else None
+    if status == 'Completed':
+        moved = _move_task(session, task_id, Task.status != 'Completed',
+                           status=status, completed_date=datetime.utcnow())
+        if moved and tool_id:
+            release_tool(tool_id, session=session)
+            record_task(session, tool_id, moved.assigned_date, moved.completed_date)
+        return moved is not None
+    if _move_task(session, task_id, Task.status == 'Completed', status=status, completed_date=None):
+        if tool_id:
+            acquire_tool(tool_id, session=session)
+            record_task(session, tool_id, task.assigned_date, task.completed_date, sign=-1)
+        return True
+    return _move_task(session, task_id, Task.status != 'Completed', status=status) is not None
+
+
+def recount_tool_usage(session=None):
+    # Rebuild in_use_count from the open tasks (after upgrades or manual edits)
+    session = session or db.session
+    open_tasks = (select(func.count(Task.id))
+                  .where(Task.tool_id == Tool.id, Task.status != 'Completed')
+                  .scalar_subquery())
+    session.execute(update(Tool).values(in_use_count=open_tasks), execution_options={'synchronize_session': False})
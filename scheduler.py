@@ -0,0 +1,119 @@
+# scheduler.py
+import heapq
+from collections import deque
+from sqlalchemy import func, select
+from models import db, User, Tool, Task, JobRequest
+from bulk import TASK_PRIORITIES, bulk_assign_tasks, _as_int
+
+# Batch task scheduling. Given new tasks (and, optionally, the pending job
+# requests), plan() hands each one to the least-loaded worker and an Available
+# tool in priority order, then commit() applies the plan through
+# bulk_assign_tasks, whose conditional tool checkout rejects anything another
+# owner took in the meantime.
+#
+# Worker load is the open tasks weighted by priority. Workers sit in a min-heap
+# keyed by load, so each pick is O(log workers); tools are a queue plus a set
+# for requested ones. A run reads the database three times however big it is.
+
+PRIORITY_WEIGHTS = {'High': 3, 'Medium': 2, 'Low': 1}
+PRIORITY_RANK = {'High': 0, 'Medium': 1, 'Low': 2}
+
+
+def worker_loads(session=None):
+    # {worker_id: weighted open-task load}, including workers with no tasks
+    session = session or db.session
+    loads = {worker_id: 0 for worker_id in session.scalars(select(User.id).where(User.role == 'worker'))}
+    rows = session.execute(select(Task.worker_id, Task.priority, func.count(Task.id))
+                           .where(Task.status.in_(('Pending', 'In-Progress')))
+                           .group_by(Task.worker_id, Task.priority))
+    for worker_id, priority, count in rows:
+        if worker_id in loads:
+            loads[worker_id] += PRIORITY_WEIGHTS.get(priority, 1) * count
+    return loads
+
+
+def _requests_as_items(session):
+    # Pending job requests become tasks for their own worker (with the tool they asked for)
+    rows = session.execute(select(JobRequest.id, JobRequest.title, JobRequest.description,
+                                  JobRequest.worker_id, JobRequest.tool_id)
+                           .where(JobRequest.status == 'Pending').order_by(JobRequest.requested_date))
+    return [{'title': f"Worker Request: {title}"[:100], 'description': description, 'priority': 'Medium',
+             'worker_id': worker_id, 'tool_id': tool_id, 'job_request_id': request_id}
+            for request_id, title, description, worker_id, tool_id in rows]
+
+
+def plan(tasks, include_job_requests=False, session=None):
+    # tasks: [{'title', 'description', 'priority', 'needs_tool', 'worker_id'?, 'tool_id'?}]
+    # Returns (assignments, unscheduled). Assignments are bulk_assign_tasks items;
+    # unscheduled entries say which input couldn't be placed and why. No writes.
+    session = session or db.session
+    items = list(tasks)
+    if include_job_requests:
+        items.extend(_requests_as_items(session))
+
+    loads = worker_loads(session)
+    heap = [(load, worker_id) for worker_id, load in loads.items()]
+    heapq.heapify(heap)
+    available = session.scalars(select(Tool.id).where(Tool.status == 'Available').order_by(Tool.id)).all()
+    free_tools, free_set = deque(available), set(available)
+
+    queue = []
+    unscheduled = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or item.get('priority', 'Medium') not in TASK_PRIORITIES:
+            unscheduled.append({'index': index, 'reason': 'Invalid item or priority.'})
+            continue
+        queue.append((PRIORITY_RANK[item.get('priority', 'Medium')], index, item))
+    heapq.heapify(queue)
+
+    assignments = []
+    while queue:
+        _, index, item = heapq.heappop(queue)
+        miss = {'index': index}
+        if item.get('job_request_id'):
+            miss['job_request_id'] = item['job_request_id']
+
+        # Tool: the one asked for if it's free, else any free one when needed
+        tool_id = _as_int(item.get('tool_id')) or None
+        if tool_id:
+            if tool_id not in free_set:
+                unscheduled.append({**miss, 'reason': 'Requested tool is not available.'})
+                continue
+        elif item.get('needs_tool'):
+            while free_tools and free_tools[0] not in free_set:
+                free_tools.popleft() # Already handed out by request
+            if not free_tools:
+                unscheduled.append({**miss, 'reason': 'No tool available.'})
+                continue
+            tool_id = free_tools.popleft()
+
+        # Worker: fixed (job requests, explicit picks) or the least loaded
+        weight = PRIORITY_WEIGHTS[item.get('priority', 'Medium')]
+        worker_id = _as_int(item.get('worker_id'))
+        if worker_id:
+            if worker_id not in loads:
+                unscheduled.append({**miss, 'reason': 'Unknown worker.'})
+                continue
+            loads[worker_id] += weight # Its heap entry goes stale; fixed up lazily below
+        else:
+            if not heap:
+                unscheduled.append({**miss, 'reason': 'No workers.'})
+                continue
+            load, worker_id = heapq.heappop(heap)
+            while load != loads[worker_id]: # Stale entry: re-queue with the current load
+                load, worker_id = heapq.heappushpop(heap, (loads[worker_id], worker_id))
+            loads[worker_id] += weight
+            heapq.heappush(heap, (loads[worker_id], worker_id))
+
+        if tool_id:
+            free_set.discard(tool_id)
+        assignments.append({'title': item.get('title'), 'description': item.get('description'),
+                            'priority': item.get('priority', 'Medium'), 'worker_id': worker_id,
+                            'tool_id': tool_id, 'job_request_id': item.get('job_request_id')})
+    unscheduled.sort(key=lambda entry: entry['index'])
+    return assignments, unscheduled
+
+
+def commit(assignments, actor_id=None):
+    # Applies a (previewed) plan; returns bulk_assign_tasks' (created, errors)
+    return bulk_assign_tasks(assignments, actor_id)
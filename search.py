@@ -0,0 +1,170 @@
+# search.py
+import re
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import object_session
+from models import db, Tool, Task, ToolIssue, JobRequest
+
+# Full-text search over tasks, tools, issues and job requests, backed by one
+# SQLite FTS5 table. Each indexed row's FTS rowid encodes its kind and id
+# (id * 4 + kind code), so updates and deletes are rowid lookups. ORM writes
+# are collected per transaction and applied in before_commit, inside the same
+# transaction; Core bulk deletes (archival) call remove_rows() themselves.
+# Other databases get a plain LIKE scan instead of the index.
+
+INDEX_TABLE = 'search_index'
+KINDS = {Task: 'task', Tool: 'tool', ToolIssue: 'issue', JobRequest: 'job_request'}
+KIND_CODES = {'task': 0, 'tool': 1, 'issue': 2, 'job_request': 3}
+MODELS = {kind: model for model, kind in KINDS.items()}
+TITLE_COLUMNS = {Task: 'title', Tool: 'name', ToolIssue: 'title', JobRequest: 'title'}
+
+_available = {} # engine url -> whether the FTS table exists
+
+
+def _doc_id(kind, row_id):
+    return row_id * 4 + KIND_CODES[kind]
+
+
+def index_available(engine=None):
+    engine = engine or db.engine
+    key = str(engine.url)
+    if key not in _available:
+        _available[key] = engine.dialect.name == 'sqlite' and inspect(engine).has_table(INDEX_TABLE)
+    return _available[key]
+
+
+def create_index(engine=None):
+    # Called by upgrade_db; returns True when the table was just created
+    engine = engine or db.engine
+    if engine.dialect.name != 'sqlite' or inspect(engine).has_table(INDEX_TABLE):
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE VIRTUAL TABLE {INDEX_TABLE} USING fts5(title, body, "
+                          f"tokenize='porter unicode61')"))
+        # Title matches count five times as much as body matches
+        conn.execute(text(f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}, rank) VALUES ('rank', 'bm25(5.0, 1.0)')"))
+    _available[str(engine.url)] = True
+    return True
+
+
+def rebuild_index(session=None):
+    # Repopulate from scratch with one INSERT ... SELECT per table
+    session = session or db.session
+    session.execute(text(f'DELETE FROM {INDEX_TABLE}'))
+    for model, kind in KINDS.items():
+        table = model.__tablename__
+        session.execute(text(f"INSERT INTO {INDEX_TABLE}(rowid, title, body) "
+                             f"SELECT id * 4 + {KIND_CODES[kind]}, {TITLE_COLUMNS[model]}, "
+                             f"coalesce(description, '') FROM {table}"))
+    session.execute(text(f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('optimize')"))
+    session.commit()
+
+
+def remove_rows(session, model, ids):
+    if ids and index_available(session.get_bind()):
+        session.execute(text(f'DELETE FROM {INDEX_TABLE} WHERE rowid = :rowid'),
+                        [{'rowid': _doc_id(KINDS[model], row_id)} for row_id in ids])
+
+
+# Incremental sync: mapper events note which rows changed, before_commit writes them
+def _note(mapper, connection, target, deleted=False):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('search_changes', {})[(KINDS[type(target)], target.id)] = None if deleted else target
+
+def _note_deleted(mapper, connection, target):
+    _note(mapper, connection, target, deleted=True)
+
+def _note_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in (TITLE_COLUMNS[type(target)], 'description')):
+        _note(mapper, connection, target)
+
+for _model in KINDS:
+    event.listen(_model, 'after_insert', _note)
+    event.listen(_model, 'after_update', _note_updated)
+    event.listen(_model, 'after_delete', _note_deleted)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _before_commit(session):
+    session.flush() # Rows flushed by the commit itself still reach the mapper events
+    changes = session.info.pop('search_changes', None)
+    if not changes or not index_available(session.get_bind()):
+        return
+    session.execute(text(f'DELETE FROM {INDEX_TABLE} WHERE rowid = :rowid'),
+                    [{'rowid': _doc_id(kind, row_id)} for kind, row_id in changes])
+    rows = [{'rowid': _doc_id(kind, row_id), 'title': getattr(target, TITLE_COLUMNS[type(target)]),
+             'body': target.description or ''}
+            for (kind, row_id), target in changes.items() if target is not None]
+    if rows:
+        session.execute(text(f'INSERT INTO {INDEX_TABLE}(rowid, title, body) VALUES (:rowid, :title, :body)'), rows)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('search_changes', None)
+
+
+def match_expression(query, any_word=False):
+    # Free text -> FTS5 query: every word as a quoted term (so user input can't
+    # use FTS syntax), the last one as a prefix. All words must match unless
+    # any_word; bm25 then ranks rows matching more (and rarer) words first.
+    words = re.findall(r'\w+', query.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']
+    return (' OR ' if any_word else ' ').join(terms)
+
+
+def search(query, kind=None, after=None, per_page=20):
+    # Ranked page of {'kind', 'id', 'title', 'snippet'} plus the cursor of the
+    # next page ("<rank>:<rowid>[:any]", or None). Rows with all the words come
+    # first; only when there are none does it fall back to rows with any of them.
+    if not match_expression(query):
+        return [], None
+    if not index_available():
+        return _like_search(query, kind, per_page), None
+    if after:
+        rank, rowid, *mode = after.split(':')
+        return _ranked_page(query, kind, (float(rank), int(rowid)), per_page, mode == ['any'])
+    items, next_after = _ranked_page(query, kind, None, per_page, False)
+    if not items and len(re.findall(r'\w+', query)) > 1:
+        items, next_after = _ranked_page(query, kind, None, per_page, True)
+    return items, next_after
+
+
+def _ranked_page(query, kind, after, per_page, any_word):
+    # Ranking has to score every matching row, so a word found in most rows is
+    # the slow case; requiring all the words keeps the match set small
+    params = {'q': match_expression(query, any_word), 'limit': per_page + 1}
+    filters = ''
+    if kind:
+        filters += ' AND rowid % 4 = :code'
+        params['code'] = KIND_CODES[kind]
+    if after:
+        filters += ' AND (rank > :rank OR (rank = :rank AND rowid > :rowid))'
+        params['rank'], params['rowid'] = after
+    rows = db.session.execute(text(
+        f"SELECT rowid, rank, title, snippet({INDEX_TABLE}, 1, '[', ']', '…', 12) AS snippet "
+        f"FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH :q{filters} ORDER BY rank, rowid LIMIT :limit"),
+        params).all()
+    codes = {code: name for name, code in KIND_CODES.items()}
+    items = [{'kind': codes[row.rowid % 4], 'id': row.rowid // 4, 'title': row.title, 'snippet': row.snippet}
+             for row in rows[:per_page]]
+    next_after = None
+    if len(rows) > per_page:
+        last = rows[per_page - 1]
+        next_after = f"{last.rank!r}:{last.rowid}" + (':any' if any_word else '')
+    return items, next_after
+
+
+def _like_search(query, kind, limit):
+    # Fallback without FTS: substring match on the titles, newest first, no paging
+    results = []
+    pattern = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%' # Literal % and _
+    for model in ([MODELS[kind]] if kind else KINDS):
+        title = getattr(model, TITLE_COLUMNS[model])
+        for row_id, row_title in (db.session.query(model.id, title).filter(title.ilike(pattern, escape='\\'))
+                                  .order_by(model.id.desc()).limit(limit)):
+            results.append({'kind': KINDS[model], 'id': row_id, 'title': row_title, 'snippet': row_title})
+    return results[:limit]
@@ -0,0 +1,120 @@
+# seed.py
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, insert, select, update
+from models import db, User, Tool, Task, ToolIssue, JobRequest
+from choices import mark_choices_dirty
+from reservations import recount_tool_usage
+from passwords import hash_password
+from search import index_available, rebuild_index
+from analytics import rebuild_rollups
+
+# Synthetic farm data for benchmarks. The same seed and volumes always give the
+# same rows, so runs against freshly seeded databases are comparable. Rows go
+# in with multi-row INSERTs in batches; every seeded user shares one password
+# (hashed once, SEED_PASSWORD) so logins can be benchmarked too.
+
+SEED_PASSWORD = 'farm-bench'
+OWNER_USERNAME = 'bench_owner'
+TASK_STATUSES = ('Pending', 'In-Progress', 'Completed', 'Completed') # Mostly finished work, like a real farm
+PRIORITIES = ('Low', 'Medium', 'High')
+ISSUE_STATUSES = ('Reported', 'Under Review', 'Resolved', 'Resolved')
+REQUEST_STATUSES = ('Pending', 'Approved', 'Declined')
+
+
+# Development accounts, created by `flask init-db` and the dev server when missing
+DEFAULT_USERS = (('admin', 'admin@example.com', 'owner', 'admin123'),
+                 ('worker1', 'worker1@example.com', 'worker', 'worker123'))
+
+
+def ensure_default_users(session=None):
+    # Returns the usernames it had to add
+    session = session or db.session
+    added = []
+    for username, email, role, password in DEFAULT_USERS:
+        if session.query(User.id).filter_by(username=username).first() is None:
+            user = User(username=username, email=email, role=role)
+            user.set_password(password)
+            session.add(user)
+            added.append(username)
+    session.commit()
+    return added
+
+
+def worker_username(number):
+    return f'farmhand{number}'
+
+
+def _insert_batches(session, model, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            session.execute(insert(model), batch)
+            batch = []
+    if batch:
+        session.execute(insert(model), batch)
+
+
+def seed_farm(workers=50, tools=200, tasks=10000, issues=1000, job_requests=1000, seed=42,
+              batch_size=5000, session=None):
+    # Adds an owner plus the given volumes and returns the row counts added
+    session = session or db.session
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    password_hash = hash_password(SEED_PASSWORD)
+
+    def moment(max_days=365):
+        return now - timedelta(seconds=rng.randrange(max_days * 86400))
+
+    session.execute(insert(User), [{'username': OWNER_USERNAME, 'email': 'owner@bench.example',
+                                    'password_hash': password_hash, 'role': 'owner'}])
+    _insert_batches(session, User, ({'username': worker_username(n), 'email': f'{worker_username(n)}@bench.example',
+                                     'password_hash': password_hash, 'role': 'worker'}
+                                    for n in range(workers)), batch_size)
+    worker_ids = session.scalars(select(User.id).where(User.username.like('farmhand%'))
+                                 .order_by(User.id)).all()
+    _insert_batches(session, Tool, ({'name': f'Tool {n}', 'description': f'Synthetic tool {n}',
+                                     'status': 'Maintenance' if rng.random() < 0.05 else 'Available'}
+                                    for n in range(tools)), batch_size)
+    tool_ids = session.scalars(select(Tool.id).where(Tool.name.like('Tool %')).order_by(Tool.id)).all()
+
+    def task_row(n):
+        status = rng.choice(TASK_STATUSES)
+        assigned = moment()
+        return {'title': f'Task {n}', 'description': 'Synthetic task', 'priority': rng.choice(PRIORITIES),
+                'status': status, 'assigned_date': assigned,
+                'completed_date': assigned + timedelta(hours=rng.randrange(1, 72)) if status == 'Completed' else None,
+                'worker_id': rng.choice(worker_ids),
+                'tool_id': rng.choice(tool_ids) if rng.random() < 0.7 else None}
+
+    _insert_batches(session, Task, (task_row(n) for n in range(tasks)), batch_size)
+    _insert_batches(session, ToolIssue, ({'title': f'Issue {n}', 'description': 'Synthetic issue',
+                                          'reported_date': moment(), 'status': rng.choice(ISSUE_STATUSES),
+                                          'reporter_id': rng.choice(worker_ids), 'tool_id': rng.choice(tool_ids)}
+                                         for n in range(issues)), batch_size)
+    _insert_batches(session, JobRequest, ({'title': f'Request {n}', 'description': 'Synthetic job request',
+                                           'requested_date': moment(), 'status': rng.choice(REQUEST_STATUSES),
+                                           'worker_id': rng.choice(worker_ids),
+                                           'tool_id': rng.choice(tool_ids) if rng.random() < 0.5 else None}
+                                          for n in range(job_requests)), batch_size)
+
+    # Usage counters and statuses consistent with the open tasks just added
+    recount_tool_usage(session)
+    session.execute(update(Tool).values(status=case((Tool.status.in_(('Maintenance', 'Retired')), Tool.status),
+                                                    (Tool.in_use_count > 0, 'In-Use'),
+                                                    else_='Available')),
+                    execution_options={'synchronize_session': False})
+    mark_choices_dirty(session)
+    session.commit()
+    # The multi-row INSERTs skipped the incremental search and analytics updates
+    if index_available(session.get_bind()):
+        rebuild_index(session)
+    rebuild_rollups(session)
+    return {'users': workers + 1, 'tools': tools, 'tasks': tasks, 'issues': issues, 'job_requests': job_requests}
+
+
+def table_counts(session=None):
+    session = session or db.session
+    return {model.__tablename__: session.scalar(select(func.count()).select_from(model))
+            for model in (User, Tool, Task, ToolIssue, JobRequest)}
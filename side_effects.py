@@ -0,0 +1,50 @@
+# side_effects.py
+from models import db, User, Tool, ToolIssue, JobRequest, AuditLog, Notification
+from jobs import job
+
+# Background job handlers for the owner/worker actions. Each runs after the
+# request's own transaction committed, in a transaction of its own, so it must
+# cope with rows that changed (or vanished) in between. A retry re-runs the
+# whole handler, and nothing is committed unless all of it succeeds.
+
+
+def audit(action, actor_id, target_type, target_id, detail=None):
+    db.session.add(AuditLog(action=action, actor_id=actor_id, target_type=target_type,
+                            target_id=target_id, detail=detail))
+
+
+def notify(user_ids, message):
+    db.session.add_all([Notification(user_id=user_id, message=message[:255]) for user_id in set(user_ids)])
+
+
+def owner_ids():
+    return [user_id for (user_id,) in db.session.query(User.id).filter_by(role='owner')]
+
+
+@job
+def issue_reported(issue_id):
+    # The tool was flagged for maintenance in the request; owners get a follow-up
+    issue = db.session.get(ToolIssue, issue_id)
+    if issue is None:
+        return
+    tool = db.session.get(Tool, issue.tool_id)
+    audit('issue.reported', issue.reporter_id, 'issue', issue.id, issue.title)
+    notify(owner_ids(), f"Maintenance needed on {tool.name if tool else 'a deleted tool'}: {issue.title}")
+
+
+@job
+def job_request_processed(request_id, actor_id, task_id=None):
+    job_request = db.session.get(JobRequest, request_id)
+    if job_request is None:
+        return
+    audit(f'job_request.{job_request.status.lower()}', actor_id, 'job_request', job_request.id,
+          f'task {task_id}' if task_id else None)
+    notify([job_request.worker_id], f"Your job request '{job_request.title}' was {job_request.status.lower()}.")
+
+
+@job
+def tool_deleted(tool_id, tool_name, actor_id, worker_ids):
+    # The tool is retired and its rows are being archived, so the request
+    # passes along what we need
+    audit('tool.deleted', actor_id, 'tool', tool_id, tool_name)
+    notify(worker_ids, f"Tool '{tool_name}' was retired; your tasks and requests for it were archived.")
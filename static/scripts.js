@@ -1,2 +1,70 @@
 // Add any JavaScript functionality here if needed in the future.
-// For example, dynamic updates, form validations, etc.
\ No newline at end of file
+// For example, dynamic updates, form validations, etc.
+
+// Live dashboards: apply the small deltas pushed by /events instead of
+// reloading the whole page.
+(function () {
+    var root = document.querySelector('[data-live-events]');
+    if (!root || !window.EventSource) {
+        return;
+    }
+
+    function formatDate(value) {
+        return value ? value.slice(0, 16).replace('T', ' ') : 'N/A';
+    }
+
+    function showReloadNotice() {
+        if (document.getElementById('live-reload-notice')) {
+            return;
+        }
+        var notice = document.createElement('div');
+        notice.id = 'live-reload-notice';
+        notice.className = 'flash-message info';
+        notice.innerHTML = 'New items were added. <a href="">Reload</a> to see them.';
+        root.parentNode.insertBefore(notice, root);
+    }
+
+    function applyDelta(kind, data) {
+        var row = document.querySelector('tr[data-' + kind.replace('_', '-') + '-id="' + data.id + '"]');
+        if (!row) {
+            if (data.created) {
+                showReloadNotice();
+            }
+            return;
+        }
+        var keep = row.parentNode.getAttribute('data-keep-status');
+        if (data.deleted || (keep && data.status && data.status !== keep)) {
+            row.parentNode.removeChild(row);
+            return;
+        }
+        Object.keys(data).forEach(function (field) {
+            var cell = row.querySelector('[data-field="' + field + '"]');
+            if (cell) {
+                cell.textContent = field.slice(-5) === '_date' ? formatDate(data[field]) : data[field];
+            }
+        });
+        var select = row.querySelector('select[name="status"]');
+        if (select && data.status) {
+            select.value = data.status;
+        }
+    }
+
+    var source = new EventSource(root.getAttribute('data-live-events'));
+    ['tool', 'task', 'issue', 'job_request'].forEach(function (kind) {
+        source.addEventListener(kind, function (event) {
+            applyDelta(kind, JSON.parse(event.data));
+        });
+    });
+    source.addEventListener('stats', function (event) {
+        var stats = JSON.parse(event.data);
+        Object.keys(stats).forEach(function (key) {
+            var card = document.querySelector('[data-stat="' + key + '"]');
+            if (card) {
+                card.textContent = stats[key];
+            }
+        });
+    });
+    source.addEventListener('reload', function () {
+        window.location.reload();
+    });
+})();
@@ -0,0 +1,78 @@
+# stats.py
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from models import db, Tool, Task, ToolIssue, JobRequest
+
+
+def status_query(model, *criteria, session=None):
+    # The query status_counts runs (also what migrations.explain_hot_queries checks)
+    return ((session or db.session).query(model.status, func.count(model.id))
+            .filter(*criteria).group_by(model.status))
+
+
+def status_counts(model, *criteria, session=None):
+    # One GROUP BY query per model: cost grows with the number of statuses,
+    # not with the number of rows loaded into Python.
+    counts = dict(status_query(model, *criteria, session=session).all())
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+LISTED_TOOLS = (Tool.status != 'Retired',) # Retired tools are out of the stats and lists
+
+
+def tool_stats(session=None):
+    return status_counts(Tool, *LISTED_TOOLS, session=session)
+
+
+def task_stats(worker_id=None, session=None):
+    if worker_id is not None:
+        return status_counts(Task, Task.worker_id == worker_id, session=session)
+    return status_counts(Task, session=session)
+
+
+def issue_stats(session=None):
+    return status_counts(ToolIssue, session=session)
+
+
+def job_request_stats(worker_id=None, session=None):
+    if worker_id is not None:
+        return status_counts(JobRequest, JobRequest.worker_id == worker_id, session=session)
+    return status_counts(JobRequest, session=session)
+
+
+def owner_dashboard_stats(session=None):
+    # The owner dashboard's stat cards, keyed by the names the template uses
+    tool_counts = tool_stats(session)
+    task_counts = task_stats(session=session)
+    issue_counts = issue_stats(session)
+    request_counts = job_request_stats(session=session)
+    return {
+        'total_tools': tool_counts['total'],
+        'available_tools': tool_counts.get('Available', 0),
+        'in_use_tools': tool_counts.get('In-Use', 0),
+        'maintenance_tools': tool_counts.get('Maintenance', 0),
+        'total_tasks': task_counts['total'],
+        'pending_tasks': task_counts.get('Pending', 0),
+        'in_progress_tasks': task_counts.get('In-Progress', 0),
+        'completed_tasks': task_counts.get('Completed', 0),
+        'open_issues': issue_counts['total'] - issue_counts.get('Resolved', 0),
+        'pending_requests': request_counts.get('Pending', 0),
+    }
+
+
+def worker_dashboard_stats(worker_id, session=None):
+    task_counts = task_stats(worker_id, session)
+    return {
+        'total_tasks': task_counts['total'],
+        'pending_tasks': task_counts.get('Pending', 0),
+        'in_progress_tasks': task_counts.get('In-Progress', 0),
+        'completed_tasks': task_counts.get('Completed', 0),
+    }
+
+
+def pending_job_requests():
+    # The owner dashboard's pending-requests section (keyset-paged on id, newest
+    # first); migrations.explain_hot_queries checks the plan of this same query
+    return (JobRequest.query.filter_by(status='Pending')
+                            .options(joinedload(JobRequest.requester), joinedload(JobRequest.tool)))
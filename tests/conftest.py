@@ -0,0 +1,26 @@
+import pytest
+from app import create_app
+from migrations import upgrade_db
+from models import db, User, Tool
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/test.db', 'TESTING': True,
+                      'WTF_CSRF_ENABLED': False, 'JOB_BACKEND': 'inline', 'ARCHIVE_BATCH_PAUSE': 0})
+    with app.app_context():
+        upgrade_db()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def farm(app):
+    # One owner, one worker and one tool; password hashes are placeholders
+    owner = User(username='owner', email='owner@example.com', role='owner', password_hash='-')
+    worker = User(username='worker', email='worker@example.com', role='worker', password_hash='-')
+    tool = Tool(name='Tractor')
+    db.session.add_all([owner, worker, tool])
+    db.session.commit()
+    return {'owner': owner.id, 'worker': worker.id, 'tool': tool.id}
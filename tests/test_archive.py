@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import func, select
+from archive import archive_rows, archive_finished
+from models import db, Task, task_archive
+
+
+def _task(farm, **fields):
+    task = Task(title='Plough', worker_id=farm['worker'], tool_id=farm['tool'], **fields)
+    db.session.add(task)
+    db.session.commit()
+    return task.id
+
+
+def test_archived_ids_are_not_reused(farm):
+    first = _task(farm, status='Completed', completed_date=datetime.utcnow())
+    assert archive_rows(Task, Task.status == 'Completed') == 1
+
+    second = _task(farm, status='Completed', completed_date=datetime.utcnow())
+    assert second > first
+    assert archive_rows(Task, Task.status == 'Completed') == 1
+    assert db.session.scalar(select(func.count()).select_from(task_archive)) == 2
+
+
+def test_retention_archives_new_work_after_earlier_runs(farm):
+    # Finished work is usually the newest id range, so the next task would
+    # reuse an archived id if the sequence didn't move past it
+    old = datetime(2000, 1, 1)
+    _task(farm, status='Completed', assigned_date=old, completed_date=old)
+    assert archive_finished(days=30)['Task'] == 1
+
+    _task(farm, status='Completed', assigned_date=old, completed_date=old)
+    _task(farm, status='Pending')
+    assert archive_finished(days=30)['Task'] == 1
+    assert db.session.scalar(select(func.count()).select_from(task_archive)) == 2
+    assert Task.query.count() == 1
@@ -0,0 +1,25 @@
+import json
+import os
+from PIL import Image
+from assets import build_assets
+
+
+def test_rebuilds_swap_the_manifest_and_keep_older_files(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'css').mkdir(parents=True)
+    (static / 'css' / 'style.css').write_text('body { color: green; }')
+    Image.new('RGB', (400, 200), 'green').save(static / 'field.jpeg')
+    manifest_path = static / 'build' / 'manifest.json'
+
+    build_assets(str(static), widths=(200,))
+    first = json.loads(manifest_path.read_text())
+    assert [variant[0] for variant in first['images']['field.jpeg']['webp']] == [200, 400]
+    (static / 'css' / 'style.css').write_text('body { color: brown; }')
+    build_assets(str(static), widths=(200,))
+    second = json.loads(manifest_path.read_text())
+
+    assert first['files']['css/style.css'] != second['files']['css/style.css']
+    for built in (first['files']['css/style.css'], second['files']['css/style.css']):
+        assert (static / built).exists()
+    assert first['images'] == second['images']
+    assert [name for name in os.listdir(static) if name.startswith('.build-')] == []
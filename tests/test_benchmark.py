@@ -0,0 +1,11 @@
+import benchmark
+
+
+def test_failed_forked_workers_are_counted_not_returned_from(app, tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path}/boot.db')
+    def broken_worker(app, requests):
+        raise RuntimeError('worker died')
+    monkeypatch.setattr(benchmark, '_forked_worker', broken_worker)
+    report = benchmark.measure_boot(app, runs=1, workers=2, requests=1)
+    assert report['preforked_workers'] == {'workers': 2, 'failed': 2}
+    assert report['fresh_interpreter']['create_app_ms'] > 0
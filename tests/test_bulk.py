@@ -0,0 +1,42 @@
+import json
+from bulk import bulk_assign_tasks, bulk_update_task_status
+from models import db, Tool, Task, JobRequest, LiveEvent
+
+
+def test_assign_rejects_wrongly_typed_fields_per_item(farm):
+    created, errors = bulk_assign_tasks([
+        {'title': 5, 'worker_id': farm['worker']},
+        {'title': 'Plough', 'description': ['x'], 'worker_id': farm['worker']},
+        {'title': 'x' * 101, 'worker_id': farm['worker']},
+        {'title': ' Sow ', 'description': 'North field', 'worker_id': farm['worker']},
+    ])
+    assert [error['index'] for error in errors] == [0, 1, 2]
+    assert errors[0]['errors'] == ['Title must be a string.']
+    assert errors[1]['errors'] == ['Description must be a string.']
+    assert errors[2]['errors'] == ['Title must be at most 100 characters.']
+    assert [task.title for task in Task.query.filter(Task.id.in_(created))] == ['Sow']
+
+
+def test_failed_job_request_approval_hands_the_tool_back(farm):
+    request = JobRequest(title='Harrow', description='-', worker_id=farm['owner'], tool_id=farm['tool'])
+    db.session.add(request)
+    db.session.commit()
+    created, errors = bulk_assign_tasks([{'title': 'Harrow', 'worker_id': farm['worker'], 'tool_id': farm['tool'],
+                                          'job_request_id': request.id}])
+    assert created == [] and errors[0]['errors'] == ['Job request is not pending for this worker.']
+    tool = db.session.get(Tool, farm['tool'])
+    assert (tool.status, tool.in_use_count) == ('Available', 0)
+    assert db.session.get(JobRequest, request.id).status == 'Pending'
+
+
+def test_reopened_tasks_are_updated_once(farm):
+    task = Task(title='Plough', worker_id=farm['worker'], tool_id=farm['tool'], status='Completed')
+    db.session.add(task)
+    db.session.commit()
+    last = db.session.query(db.func.max(LiveEvent.id)).scalar()
+    updated, errors = bulk_update_task_status([{'task_id': task.id, 'status': 'In-Progress'}], farm['worker'])
+    assert (updated, errors) == ([task.id], [])
+    deltas = [json.loads(event.data) for event in LiveEvent.query.filter(LiveEvent.id > last, LiveEvent.kind == 'task')]
+    assert [(delta['id'], delta['status']) for delta in deltas] == [(task.id, 'In-Progress')]
+    tool = db.session.get(Tool, farm['tool'])
+    assert (tool.status, tool.in_use_count) == ('In-Use', 1)
@@ -0,0 +1,33 @@
+from app import create_app
+from choices import tool_choices
+from models import db, Tool
+from reservations import acquire_tool, retire_tool
+
+
+def test_tool_labels_ignore_status_changes(app, farm):
+    assert tool_choices() == [(farm['tool'], 'Tractor')]
+    version = app.extensions['choices']['version']
+    acquire_tool(farm['tool'])
+    db.session.get(Tool, farm['tool']).status = 'Maintenance'
+    db.session.commit()
+    assert app.extensions['choices']['version'] == version
+    assert tool_choices() == [(farm['tool'], 'Tractor')]
+
+
+def test_renames_and_retirements_rebuild_the_list(app, farm):
+    tool_choices()
+    db.session.get(Tool, farm['tool']).name = 'Old Tractor'
+    db.session.commit()
+    assert tool_choices() == [(farm['tool'], 'Old Tractor')]
+    retire_tool(farm['tool'])
+    db.session.commit()
+    assert tool_choices() == []
+
+
+def test_each_app_keeps_its_own_lists(app, farm, tmp_path):
+    other = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/other.db'})
+    tool_choices()
+    with other.app_context():
+        db.create_all()
+        assert tool_choices() == []
+    assert tool_choices() == [(farm['tool'], 'Tractor')]
@@ -0,0 +1,104 @@
+import events
+from app import create_app
+from events import broker, subscriber_filter
+from models import db, User, Tool, Task
+
+
+def test_committed_changes_reach_subscribers_through_the_event_table(app, farm):
+    app.config['EVENT_STATS_INTERVAL'] = 0
+    owner = db.session.get(User, farm['owner'])
+    subscription = broker.subscribe(subscriber_filter(owner), stats=True)
+    try:
+        broker.poll() # Starts from the current end of the table
+        tool = db.session.get(Tool, farm['tool'])
+        tool.status = 'Maintenance'
+        db.session.commit()
+        broker.poll()
+        kind, data = subscription.get(0)
+        assert (kind, data['id'], data['status']) == ('tool', farm['tool'], 'Maintenance')
+        assert subscription.get(0)[0] == 'stats'
+        broker.poll()
+        assert subscription.get(0) is None # Delivered once
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def test_rolled_back_changes_are_not_published(farm):
+    owner = db.session.get(User, farm['owner'])
+    subscription = broker.subscribe(subscriber_filter(owner))
+    try:
+        broker.poll()
+        db.session.add(Task(title='Never', worker_id=farm['worker']))
+        db.session.flush()
+        db.session.rollback()
+        broker.poll()
+        assert subscription.get(0) is None
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def test_stats_are_debounced_and_only_computed_for_owner_streams(app, farm, monkeypatch):
+    computed = []
+    monkeypatch.setattr(events, 'owner_dashboard_stats', lambda session: computed.append(1) or {})
+    app.config['EVENT_STATS_INTERVAL'] = 3600
+    worker = db.session.get(User, farm['worker'])
+    subscription = broker.subscribe(subscriber_filter(worker))
+    try:
+        broker.poll()
+        for status in ('Maintenance', 'Available'):
+            db.session.get(Tool, farm['tool']).status = status
+            db.session.commit()
+            broker.poll()
+        assert computed == [] # No owner is watching
+
+        owner = broker.subscribe(subscriber_filter(db.session.get(User, farm['owner'])), stats=True)
+        broker.poll()
+        broker.poll()
+        assert computed == [1] # Once per interval, not per commit or poll
+        broker.unsubscribe(owner)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def test_workers_only_get_their_own_task_deltas(farm):
+    other = User(username='other', email='other@example.com', role='worker', password_hash='-')
+    db.session.add(other)
+    db.session.commit()
+    mine = Task(title='Mine', worker_id=farm['worker'])
+    theirs = Task(title='Theirs', worker_id=other.id)
+    db.session.add_all([mine, theirs])
+    db.session.commit()
+    mine_id, theirs_id = mine.id, theirs.id
+
+    worker = db.session.get(User, farm['worker'])
+    subscription = broker.subscribe(subscriber_filter(worker))
+    try:
+        broker.poll()
+        for task_id in (mine_id, theirs_id):
+            task = db.session.get(Task, task_id)
+            db.session.expire(task, ['worker_id']) # Not loaded when the change is flushed
+            task.status = 'Completed'
+        db.session.commit()
+        db.session.delete(db.session.get(Task, theirs_id))
+        db.session.delete(db.session.get(Task, mine_id))
+        db.session.commit()
+        broker.poll()
+        received = []
+        while (item := subscription.get(0)) is not None:
+            received.append(item)
+        assert received and all(data['worker_id'] == farm['worker'] for kind, data in received)
+        assert ('task', {'id': mine_id, 'deleted': True, 'worker_id': farm['worker']}) in received
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def test_each_app_gets_its_own_feed(app, farm, tmp_path):
+    other = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/other.db'})
+    subscription = broker.subscribe(subscriber_filter(db.session.get(User, farm['owner'])))
+    try:
+        assert broker.subscriber_count() == 1
+        with other.app_context():
+            assert broker.subscriber_count() == 0
+    finally:
+        broker.unsubscribe(subscription)
+    assert app.extensions['live_events'] is not other.extensions['live_events']
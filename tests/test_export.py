@@ -0,0 +1,23 @@
+import json
+from export import fetch_page, stream_ndjson
+from models import db, Task
+
+
+def test_pages_walk_the_table_in_id_order(farm):
+    db.session.add_all([Task(title=f'Task {n}', worker_id=farm['worker']) for n in range(5)])
+    db.session.commit()
+    ids, after = [], None
+    while True:
+        items, after = fetch_page('tasks', after, limit=2)
+        ids.extend(item['id'] for item in items)
+        if after is None:
+            break
+    assert ids == sorted(ids) and len(ids) == 5
+    assert isinstance(items[0]['assigned_date'], str) # ISO 8601, JSON-ready
+
+
+def test_ndjson_export_streams_every_row(farm):
+    db.session.add_all([Task(title=f'Task {n}', worker_id=farm['worker']) for n in range(3)])
+    db.session.commit()
+    rows = [json.loads(line) for line in stream_ndjson('tasks', batch_size=2)]
+    assert [row['title'] for row in rows] == ['Task 0', 'Task 1', 'Task 2']
@@ -0,0 +1,53 @@
+from config import Config
+from loadtest import checkout_stress
+from models import db, Tool, Task, JobRequest
+
+
+def _owner_client(app, farm):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(farm['owner'])
+        session['_fresh'] = True
+    return client
+
+
+def _request(farm, **values):
+    job_request = JobRequest(title='Harrow', description='-', worker_id=farm['worker'], tool_id=farm['tool'],
+                             **values)
+    db.session.add(job_request)
+    db.session.commit()
+    return job_request.id
+
+
+def _process(client, request_id, action='approve'):
+    response = client.post(f'/owner/process_job_request/{request_id}',
+                           data={'action': action, 'new_task_priority': 'Medium'}, follow_redirects=True)
+    return response.get_data(as_text=True)
+
+
+def test_a_request_is_processed_once(app, farm):
+    client = _owner_client(app, farm)
+    request_id = _request(farm)
+    assert 'approved and converted to a task' in _process(client, request_id)
+    assert 'already processed' in _process(client, request_id)
+    assert 'already processed' in _process(client, request_id, 'decline')
+    assert Task.query.filter_by(worker_id=farm['worker']).count() == 1
+    tool = db.session.get(Tool, farm['tool'])
+    assert (db.session.get(JobRequest, request_id).status, tool.status, tool.in_use_count) == ('Approved', 'In-Use', 1)
+
+
+def test_approval_needs_a_tool_in_service(app, farm):
+    client = _owner_client(app, farm)
+    request_id = _request(farm)
+    db.session.get(Tool, farm['tool']).status = 'Maintenance'
+    db.session.commit()
+    assert 'no longer available' in _process(client, request_id)
+    assert Task.query.count() == 0
+    assert db.session.get(JobRequest, request_id).status == 'Pending'
+    assert db.session.get(Tool, farm['tool']).in_use_count == 0
+
+
+def test_concurrent_exclusive_checkouts_never_overlap(app):
+    stats = checkout_stress({}, Config.SQLITE_PRAGMAS, threads=8, tools=3, attempts=400, hold=0.001)
+    assert stats['acquired'] > 0
+    assert (stats['double_checkouts'], stats['leaked_tools']) == (0, 0)
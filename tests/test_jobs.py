@@ -0,0 +1,27 @@
+from app import create_app
+from jobs import JobQueue, InlineBackend, ThreadBackend, jobs
+from models import db
+
+
+def test_each_app_gets_its_own_runner(app, tmp_path):
+    other = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/other.db', 'JOB_BACKEND': 'thread'})
+    assert isinstance(app.extensions['jobs'].backend, InlineBackend)
+    assert isinstance(other.extensions['jobs'].backend, ThreadBackend)
+    with other.app_context():
+        assert jobs.drain(1)
+    assert jobs.stats() == {'pending': 0} # This app's runner is still open and untouched
+
+
+def test_failing_jobs_are_retried_after_the_commit(app):
+    calls = []
+    def flaky():
+        calls.append(len(calls))
+        if len(calls) < 3:
+            raise RuntimeError('try again')
+    app.config.update(JOB_RETRY_DELAY=0)
+    queue = JobQueue(app, handlers={'flaky': flaky})
+    queue.enqueue('flaky')
+    assert calls == [] # Nothing runs before the commit
+    db.session.commit()
+    assert calls == [0, 1, 2]
+    assert queue.stats() == {'pending': 0, 'retried': 2, 'succeeded': 1}
@@ -0,0 +1,16 @@
+import pytest
+from config import Config
+from loadtest import compare_settings, write_throughput
+
+
+def test_write_benchmark_refuses_the_app_database(app):
+    with pytest.raises(ValueError):
+        write_throughput(app.config['SQLALCHEMY_DATABASE_URI'], writes=1)
+
+
+def test_write_benchmark_reports_settings_side_by_side(tmp_path):
+    results = compare_settings(Config.SQLALCHEMY_ENGINE_OPTIONS, Config.SQLITE_PRAGMAS, threads=2, writes=10,
+                               url=f'sqlite:///{tmp_path}/scratch.db')
+    journal_modes = [results[label]['settings']['journal_mode'] for label in ('before', 'after')]
+    assert journal_modes == ['delete', 'wal']
+    assert results['after']['committed'] == 10
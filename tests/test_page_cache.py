@@ -0,0 +1,74 @@
+import time
+from sqlalchemy import update
+from archive import archive_rows
+from models import db, Tool, Task
+from page_cache import data_versions
+
+
+def _owner_client(app, farm):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(farm['owner'])
+        session['_fresh'] = True
+    return client
+
+
+def test_core_updates_bump_versions_without_live_events(farm):
+    before = data_versions(['tool'])
+    db.session.execute(update(Tool).where(Tool.id == farm['tool']).values(status='Maintenance'),
+                       execution_options={'synchronize_session': False})
+    db.session.commit()
+    assert data_versions(['tool'])[0] == before[0] + 1
+
+
+def test_flushes_and_archival_bump_their_kinds(farm):
+    before = data_versions(['task', 'tool'])
+    db.session.add(Task(title='Plough', worker_id=farm['worker'], status='Completed'))
+    db.session.commit()
+    assert data_versions(['task', 'tool']) == (before[0] + 1, before[1])
+    archive_rows(Task, Task.status == 'Completed')
+    assert data_versions(['task'])[0] == before[0] + 2
+
+
+def test_rolled_back_writes_do_not_bump(farm):
+    before = data_versions(['tool'])
+    db.session.get(Tool, farm['tool']).status = 'Maintenance'
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+    assert data_versions(['tool']) == before
+
+
+def test_unchanged_page_revalidates_with_304(app):
+    client = app.test_client()
+    first = client.get('/tractor')
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'private, no-cache'
+    again = client.get('/tractor', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_data_commits_change_the_dashboard_etag(app, farm):
+    client = _owner_client(app, farm)
+    etag = client.get('/owner/dashboard').headers['ETag']
+    assert client.get('/owner/dashboard', headers={'If-None-Match': etag}).status_code == 304
+    db.session.get(Tool, farm['tool']).status = 'Maintenance'
+    db.session.commit()
+    response = client.get('/owner/dashboard', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+
+def test_etags_expire_with_the_ttl_window(app, monkeypatch):
+    client = app.test_client()
+    etag = client.get('/tractor').headers['ETag']
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + app.config['PAGE_CACHE_TTL'])
+    response = client.get('/tractor', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+
+def test_a_new_release_changes_the_etag(app):
+    client = app.test_client()
+    etag = client.get('/tractor').headers['ETag']
+    app.config['RELEASE_ID'] = 'next'
+    del app.extensions['page_cache_release']
+    assert client.get('/tractor', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,26 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app
+from passwords import hash_password, needs_rehash, verify_password
+
+
+@pytest.mark.parametrize('method', ['scrypt', 'scrypt:32768:8:1', 'pbkdf2:sha256', 'pbkdf2:sha256:1000'])
+def test_hash_made_with_the_configured_method_needs_no_rehash(app, method):
+    app.config['PASSWORD_HASH_METHOD'] = method
+    assert not needs_rehash(generate_password_hash('secret', method))
+
+
+def test_hash_made_with_other_parameters_needs_rehash(app):
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt'
+    assert needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:1000'))
+
+
+def test_each_app_sizes_its_own_hashing_pool(app, tmp_path):
+    other = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/other.db', 'PASSWORD_HASH_WORKERS': 1,
+                        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000'})
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    assert verify_password(hash_password('secret'), 'secret')
+    with other.app_context():
+        assert verify_password(hash_password('secret'), 'secret')
+    assert app.extensions['passwords'] is not other.extensions['passwords']
+    assert other.extensions['passwords'][0]._max_workers == 1
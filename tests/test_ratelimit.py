@@ -0,0 +1,60 @@
+from app import create_app
+from migrations import upgrade_db
+from ratelimit import DatabaseBackend, MemoryBackend
+
+
+def _login(client):
+    return client.post('/login', data={'username': 'nobody', 'password': 'wrong'}).status_code
+
+
+def test_each_app_gets_its_own_backend_and_buckets(app, tmp_path):
+    other = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/other.db', 'WTF_CSRF_ENABLED': False,
+                        'RATELIMIT_BACKEND': 'database'})
+    assert isinstance(app.extensions['ratelimit']['backend'], MemoryBackend)
+    assert isinstance(other.extensions['ratelimit']['backend'], DatabaseBackend)
+
+    app.config['RATELIMIT_LOGIN'] = '2/60'
+    client = app.test_client()
+    assert [_login(client) for _ in range(3)] == [200, 200, 429]
+    with other.app_context():
+        upgrade_db()
+    assert _login(other.test_client()) == 200 # Fresh buckets
+
+
+def test_clients_behind_trusted_proxy_get_separate_buckets(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/proxy.db', 'WTF_CSRF_ENABLED': False,
+                      'TRUSTED_PROXIES': 1, 'RATELIMIT_LOGIN': '1/60'})
+    with app.app_context():
+        upgrade_db()
+    client = app.test_client()
+    post = lambda ip: client.post('/login', data={'username': 'nobody', 'password': 'wrong'},
+                                  headers={'X-Forwarded-For': ip}).status_code
+    assert [post('203.0.113.1'), post('203.0.113.2'), post('203.0.113.1')] == [200, 200, 429]
+
+
+def test_empty_bucket_answers_429_with_retry_after(app):
+    app.config['RATELIMIT_LOGIN'] = '1/60'
+    client = app.test_client()
+    assert _login(client) == 200
+    response = client.post('/login', data={'username': 'nobody', 'password': 'wrong'},
+                           headers={'Accept': 'application/json'})
+    assert response.status_code == 429
+    assert 30 <= int(response.headers['Retry-After']) <= 60
+    assert 'try again' in response.get_json()['error']
+    assert client.get('/login').status_code == 200 # Forms themselves are never limited
+
+
+def test_busy_process_sheds_limited_posts_with_503(app):
+    app.config.update(RATELIMIT_CONCURRENCY_WAIT=0)
+    slots = app.extensions['ratelimit']['slots']
+    while slots.acquire(blocking=False):
+        pass # Every slot taken, as by slow concurrent logins
+    response = app.test_client().post('/login', data={'username': 'nobody', 'password': 'wrong'})
+    assert response.status_code == 503 and response.headers['Retry-After'] == '1'
+
+
+def test_database_buckets_are_shared_between_workers(app):
+    app.config['RATELIMIT_BACKEND'] = 'database'
+    first, second = DatabaseBackend(app), DatabaseBackend(app) # Two server processes
+    takes = [backend.take('login:203.0.113.9', 3, 3 / 60) for backend in (first, second, first, second)]
+    assert takes[:3] == [0, 0, 0] and takes[3] > 0
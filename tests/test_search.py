@@ -0,0 +1,9 @@
+from models import db, Tool
+from search import _like_search
+
+
+def test_like_fallback_treats_wildcards_literally(farm):
+    db.session.add_all([Tool(name='50% tiller'), Tool(name='seed_drill'), Tool(name='seedXdrill')])
+    db.session.commit()
+    assert [row['title'] for row in _like_search('%', 'tool', 20)] == ['50% tiller']
+    assert [row['title'] for row in _like_search('seed_', 'tool', 20)] == ['seed_drill']
@@ -0,0 +1,82 @@
+# user_cache.py
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from models import db, User
+
+# Flask-Login calls the user_loader on every authenticated request, only so the
+# templates and role decorators can read id/username/role. Those few columns are
+# kept here in a small LRU with a TTL, so a page load doesn't need a query for them.
+
+
+class SessionUser(UserMixin):
+    # Detached, read-only snapshot of the User columns the request path needs
+    __slots__ = ('id', 'username', 'email', 'role')
+
+    def __init__(self, id, username, email, role):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.role = role
+
+    def __repr__(self):
+        return f"SessionUser('{self.username}', '{self.role}')"
+
+
+_lock = threading.Lock()
+_entries = OrderedDict() # user_id -> (loaded_at, SessionUser)
+_generation = 0 # Bumped on invalidation so a load racing a commit isn't cached
+
+
+def get_session_user(user_id):
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry and now - entry[0] < current_app.config['USER_CACHE_TTL']:
+            _entries.move_to_end(user_id)
+            return entry[1]
+        generation = _generation
+    row = db.session.query(User.id, User.username, User.email, User.role).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    user = SessionUser(*row)
+    with _lock:
+        if generation != _generation:
+            return user
+        _entries[user_id] = (now, user)
+        _entries.move_to_end(user_id)
+        while len(_entries) > current_app.config['USER_CACHE_SIZE']:
+            _entries.popitem(last=False)
+    return user
+
+
+def invalidate_user(user_id):
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.pop(user_id, None)
+
+
+# Drop a user's snapshot once a change to their row commits (TTL covers other processes)
+def _mark_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+event.listen(User, 'after_update', _mark_changed)
+event.listen(User, 'after_delete', _mark_changed)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _after_commit(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('changed_user_ids', None)
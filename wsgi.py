@@ -0,0 +1,8 @@
+# wsgi.py
+from app import create_app
+
+# Production entry point: `gunicorn -c gunicorn.conf.py wsgi:app` (any WSGI
+# server works). Initialize the database first with `flask --app app init-db`;
+# workers never create tables or accounts themselves. Behind a reverse proxy,
+# set TRUSTED_PROXIES (see config.py) so per-IP rate limits see real clients.
+app = create_app()